@@ -0,0 +1,70 @@
+"""
+Compare on-chain size, rent and CPU time of plain and compressed name data.
+
+Runs offline: encodes synthetic social media profiles and timeline posts
+without compression, with plain deflate, and with a preset dictionary trained
+on a separate set of samples.
+"""
+import os
+import random
+import time
+
+from sol_namespace import codec
+from sol_namespace import operations
+
+
+N_RECORDS = int(os.getenv("N_RECORDS", 1000))
+
+random.seed(0)
+WORDS = (
+    "the a my new just today really great love this post update check out thanks "
+    "everyone week project launch shipped working on weekend coffee music photo "
+    "blockchain solana name service devnet account wallet community follow".split()
+)
+TAGS = ["#solana", "#web3", "#buildinpublic", "#devnet", "#nft", "#music", "#photography"]
+
+
+def profile() -> bytes:
+    name = "".join(random.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(8))
+    bio = " ".join(random.choice(WORDS) for _ in range(random.randint(10, 40)))
+    return (
+        f"## All About {name}\n"
+        f"Bio: {bio}\n"
+        f"Website: https://{name}.example.com\n"
+        f"Location: Earth\n"
+        f"Links: https://twitter.com/{name} https://github.com/{name}\n"
+    ).encode()
+
+
+def post() -> bytes:
+    text = " ".join(random.choice(WORDS) for _ in range(random.randint(8, 50)))
+    tags = " ".join(random.sample(TAGS, 2))
+    return f'{{"type": "post", "text": "{text.capitalize()}.", "tags": "{tags}", "reply_to": null}}'.encode()
+
+
+def benchmark(name: str, records, encode, decode):
+    raw_bytes = sum(len(record) for record in records)
+    start = time.perf_counter()
+    encoded = [encode(record) for record in records]
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = [decode(data) for data in encoded]
+    decode_time = time.perf_counter() - start
+    assert decoded == records
+    n_bytes = sum(len(data) for data in encoded)
+    print(
+        f"  {name:<12} {n_bytes / len(records):8.1f} B/record {n_bytes / raw_bytes:6.1%}"
+        f" {n_bytes * operations.PER_BYTE / len(records):10.0f} lamports/record"
+        f" {encode_time / len(records) * 1e6:7.1f} us encode {decode_time / len(records) * 1e6:6.1f} us decode"
+    )
+
+
+for kind, make in (("Profiles", profile), ("Timeline posts", post)):
+    training = [make() for _ in range(200)]
+    records = [make() for _ in range(N_RECORDS)]
+    plain = codec.Codec()
+    trained = codec.Codec(dictionary=codec.train_dictionary(training, size=2048))
+    print(f"{kind} ({N_RECORDS} records, rent at {operations.PER_BYTE} lamports per byte):")
+    benchmark("none", records, lambda record: record, lambda data: data)
+    benchmark("deflate", records, plain.encode, codec.decode)
+    benchmark("dictionary", records, trained.encode, codec.decode)
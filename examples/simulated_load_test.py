@@ -0,0 +1,67 @@
+"""
+Load test namespace operations offline against the in-process Name Service simulator.
+
+Creates a root node with many children, then reads them all back, and reports throughput.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from solana.account import Account
+
+from sol_namespace import name_model
+from sol_namespace import operations
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+
+
+N_NAMES = int(os.getenv("N_NAMES", 1000))
+WORKERS = int(os.getenv("WORKERS", 16))
+
+# Simulate a remote node: ~50ms per request, and 1% of requests throttled.
+simulator = NameServiceSimulator(latency=0.04, jitter=0.02, failure_rate=0.01, seed=0)
+client = SimulatedClient(simulator)
+
+funder = Account(os.urandom(32))
+
+root = name_model.NamespaceNode(
+    owner_account=funder.public_key(),
+    data=name_model.NamespaceData(
+        field="Simulated load test root",
+        space=0,
+        data=""),
+    )
+nodes = [
+    root.create_child(name_model.NamespaceData(field=f"name {i}", space=16, data=f"value {i}"))
+    for i in range(N_NAMES)
+]
+
+
+def create(node):
+    try:
+        return operations.create(client, node, funder)
+    except Exception:  # Injected throttling
+        return None
+
+
+def read(node):
+    try:
+        return operations.get_name_data(client, node)
+    except Exception:  # Injected throttling
+        return None
+
+
+operations.create(client, root, funder)
+
+start = time.time()
+with ThreadPoolExecutor(WORKERS) as pool:
+    created = sum(1 for txid in pool.map(create, nodes) if txid)
+elapsed = time.time() - start
+print(f"Created {created}/{N_NAMES} names in {elapsed:.1f}s ({created / elapsed:.0f} names/s)")
+
+start = time.time()
+with ThreadPoolExecutor(WORKERS) as pool:
+    list(pool.map(read, nodes))
+elapsed = time.time() - start
+print(f"Read {N_NAMES} names in {elapsed:.1f}s ({N_NAMES / elapsed:.0f} names/s)")
+
+print(dict(simulator.stats))
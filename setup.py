@@ -8,7 +8,10 @@ from setuptools import setup, find_packages
 setup(version='0.5',
       name="sol_namespace",
       description="",
-      packages=find_packages(),
+      packages=find_packages(exclude=('tests', 'tests.*')),
       install_requires=[],
+      entry_points={
+          'console_scripts': ['sol-namespace=sol_namespace.cli:main'],
+      },
       test_suite='tests'
       )
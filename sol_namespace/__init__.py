@@ -1,3 +1,5 @@
 
-from .name_model import NameProgram, NamespaceData, NamespaceNode
+from .name_model import NameProgram, NamespaceData, NamespaceNode, hash_names
 from .operations import create, update, update_bytes, get_name_data
+from .snapshot import save_tree, load_tree
+from .sync import plan_sync, apply_plan
@@ -0,0 +1,180 @@
+"""
+Bulk operations over many namespace nodes at once.
+
+Existence checks are batched through `getMultipleAccounts`, so re-running a bulk
+job only pays for the nodes that are actually missing or out of date.
+"""
+from base64 import b64decode
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Any, Dict, List, Sequence
+
+from solana.account import Account
+from solana.publickey import PublicKey
+from solana.rpc.api import Client
+from solana.system_program import SYS_PROGRAM_ID
+
+from sol_namespace.name_model import NamespaceNode, NAME_HEADER_LEN
+from sol_namespace.sender import Sender, default_sender
+from sol_namespace import operations
+
+
+MAX_MULTIPLE_ACCOUNTS = 100  # Per getMultipleAccounts request
+
+CREATED = 'created'
+UPDATED = 'updated'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+@dataclass
+class BulkResult:
+    """
+    Outcome of a bulk operation on one node.
+    """
+    node: NamespaceNode
+    action: str  # One of CREATED, UPDATED, SKIPPED, FAILED
+    result: Optional[Any] = None  # Transaction ID, if one was sent
+    error: Optional[str] = None
+
+
+def fetch_accounts(
+        client: Client,
+        accounts: Sequence[PublicKey],
+        sender: Optional[Sender]=None,
+        batch_size: int=MAX_MULTIPLE_ACCOUNTS,
+        max_workers: int=8,
+        ) -> List[Optional[bytes]]:
+    """
+    Fetch raw account data (name header included) for many accounts,
+    `batch_size` accounts per request. Missing accounts are `None`.
+    """
+    sender = sender or default_sender
+
+    def fetch(start: int) -> List[Optional[bytes]]:
+        keys = [str(key) for key in accounts[start:start + batch_size]]
+        if hasattr(client, 'get_multiple_accounts'):
+            response = sender.request(client, 'get_multiple_accounts', keys, encoding='base64')
+        else:
+            # solana-py's Client has no getMultipleAccounts wrapper; its provider shares the endpoint's rate limit
+            response = sender.request(
+                client._provider, 'make_request', 'getMultipleAccounts', keys, {'encoding': 'base64'})
+        return [
+            None if value is None else b64decode(value['data'][0])
+            for value in response['result']['value']
+        ]
+
+    starts = range(0, len(accounts), batch_size)
+    with ThreadPoolExecutor(max_workers) as pool:
+        return [data for batch in pool.map(fetch, starts) for data in batch]
+
+
+def data_matches(node: NamespaceNode, account_data: bytes) -> bool:
+    """
+    Whether a name account already holds `node`'s serialized data,
+    zero-padded to its space.
+    """
+    return account_data[NAME_HEADER_LEN:] == node.data.serialize().ljust(node.data.space, b'\0')
+
+
+def depth(node: NamespaceNode) -> int:
+    """
+    Number of ancestors of `node`.
+    """
+    n = 0
+    while node.parent is not None:
+        node, n = node.parent, n + 1
+    return n
+
+
+def _keyring(signers: Sequence[Account]) -> Dict[bytes, Account]:
+    return {bytes(signer.public_key()): signer for signer in signers}
+
+
+def _update_signer(node: NamespaceNode, keyring: Dict[bytes, Account]) -> Optional[Account]:
+    if node.class_account != SYS_PROGRAM_ID:
+        return keyring.get(bytes(node.class_account))
+    return keyring.get(bytes(node.owner_account))
+
+
+def _create_signers(node: NamespaceNode, keyring: Dict[bytes, Account]) -> Optional[List[Account]]:
+    # The owner funds the account; class and parent owner co-sign
+    required = [node.owner_account]
+    if node.class_account != SYS_PROGRAM_ID:
+        required.append(node.class_account)
+    if node.parent is not None:
+        required.append(node.parent.owner_account)
+    signers = [keyring.get(bytes(key)) for key in required]
+    return None if None in signers else signers
+
+
+def create_many(
+        client: Client,
+        nodes: Sequence[NamespaceNode],
+        *signers: Account,
+        existing: str='skip',
+        sender: Optional[Sender]=None,
+        max_workers: int=8,
+        ) -> List[BulkResult]:
+    """
+    Idempotently create (and populate) many nodes.
+
+    Nodes that already exist on chain are skipped, or with `existing='update'`,
+    updated when their data differs. Parents are created before their children,
+    and children of a parent that failed are not attempted.
+
+    `signers` must include every owner, class and parent owner account involved.
+    Results are returned in the order of `nodes`.
+    """
+    if existing not in ('skip', 'update'):
+        raise ValueError(f"existing must be 'skip' or 'update', not {existing!r}")
+    sender = sender or default_sender
+    keyring = _keyring(signers)
+    on_chain = fetch_accounts(client, [node.account for node in nodes], sender, max_workers=max_workers)
+
+    results: List[Optional[BulkResult]] = [None] * len(nodes)
+    failed_accounts = set()
+    levels: Dict[int, List[int]] = {}
+    to_update = []
+    for i, (node, account_data) in enumerate(zip(nodes, on_chain)):
+        if account_data is None:
+            levels.setdefault(depth(node), []).append(i)
+        elif existing == 'update' and not data_matches(node, account_data):
+            to_update.append(i)
+        else:
+            results[i] = BulkResult(node, SKIPPED)
+
+    def create(i: int) -> BulkResult:
+        node = nodes[i]
+        if node.parent is not None and bytes(node.parent.account) in failed_accounts:
+            return BulkResult(node, FAILED, error="parent was not created")
+        create_signers = _create_signers(node, keyring)
+        if create_signers is None:
+            return BulkResult(node, FAILED, error="missing owner, class or parent owner signer")
+        try:
+            txid = operations.create(client, node, *create_signers, sender=sender)
+        except Exception as e:  # pylint: disable=broad-except
+            return BulkResult(node, FAILED, error=str(e))
+        return BulkResult(node, CREATED, txid)
+
+    def update(i: int) -> BulkResult:
+        node = nodes[i]
+        signer = _update_signer(node, keyring)
+        if signer is None:
+            return BulkResult(node, FAILED, error="missing owner or class signer")
+        try:
+            # Pad to the full space, so that data that shrank leaves no stale bytes behind
+            padded = node.data.serialize().ljust(node.data.space, b'\0')
+            return BulkResult(node, UPDATED, operations.update_bytes(client, node, signer, padded, sender=sender))
+        except Exception as e:  # pylint: disable=broad-except
+            return BulkResult(node, FAILED, error=str(e))
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        for level in sorted(levels):
+            for i, result in zip(levels[level], pool.map(create, levels[level])):
+                results[i] = result
+                if result.action == FAILED:
+                    failed_accounts.add(bytes(result.node.account))
+        for i, result in zip(to_update, pool.map(update, to_update)):
+            results[i] = result
+    return results
@@ -0,0 +1,348 @@
+"""
+`sol-namespace` command line interface for streaming bulk namespace jobs.
+
+    sol-namespace run jobs.jsonl --keypair ~/.config/solana/id.json --checkpoint jobs.ckpt
+    sol-namespace serve --port 8899  # Local simulator to run jobs against offline
+
+Jobs are read one record at a time from JSONL or CSV (a file or stdin), and one
+JSON result line per job is written to stdout (or `--output`), with timings.
+Each record has an `op` (create, update, read, delete or transfer), a name `field`,
+and depending on the op: `data`, `space`, `offset`, `owner`, `class`, `balance`,
+`new_owner`, and `parent`, the path of parent name fields from the root
+(a JSON list, or a string split on `--path-sep`). An `id` is echoed back.
+
+Jobs run `--batch-size` at a time, `--concurrency` in parallel, ordered so that a
+job waits for earlier jobs on the same name or its parent. With `--checkpoint`,
+the last completed input line is saved after each batch, and a rerun resumes there.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from base64 import b64decode
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from itertools import islice
+from typing import Optional, Any, Dict, IO, Iterator, List, Tuple
+
+from solana.account import Account
+from solana.publickey import PublicKey
+from solana.rpc.api import Client
+from solana.rpc.exception import SolanaException
+from solana.system_program import SYS_PROGRAM_ID
+from solana.transaction import Transaction
+
+from sol_namespace.name_model import NamespaceData, NamespaceNode, NAME_HEADER_LEN
+from sol_namespace.sender import Sender, name_service_error
+from sol_namespace import instruction
+from sol_namespace import operations
+
+
+DEVNET = "https://api.devnet.solana.com"
+OPS = ('create', 'update', 'read', 'delete', 'transfer')
+_INVALID = '__invalid__'  # Key of records standing in for lines that failed to parse
+
+
+class JobError(Exception):
+    """
+    A job record that cannot be run as given.
+    """
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lazily yield `(line number, record)` from JSONL or CSV. Lines that are not
+    JSON objects yield a record that fails to run, so the rest still do.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, {key: value for key, value in record.items() if value not in (None, '')}
+        return
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, {_INVALID: f"invalid JSON: {e}"}
+            continue
+        if not isinstance(record, dict):
+            record = {_INVALID: "record is not a JSON object"}
+        yield line_no, record
+
+
+def _load_checkpoint(path: Optional[str]) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, 'r') as f:
+        return json.load(f)['line']
+
+
+def _save_checkpoint(path: str, line_no: int):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'line': line_no}, f)
+    os.replace(tmp, path)
+
+
+class JobRunner:
+    """
+    Maps job records onto `NamespaceNode`s and runs them.
+    """
+    def __init__(self, client: Any, sender: Sender, keypair: Optional[Account], path_sep: str='/'):
+        self.client = client
+        self.sender = sender
+        self.keypair = keypair
+        self.path_sep = path_sep
+        self._parents: Dict[Tuple[str, ...], NamespaceNode] = {}
+        self._rent: Dict[int, int] = {}
+
+    def parent_path(self, record: Dict[str, Any]) -> Tuple[str, ...]:
+        parent = record.get('parent') or ()
+        if isinstance(parent, str):
+            parent = parent.split(self.path_sep)
+        return tuple(parent)
+
+    def _signer(self) -> Account:
+        if self.keypair is None:
+            raise JobError("a --keypair is required for this op")
+        return self.keypair
+
+    def _parent(self, path: Tuple[str, ...]) -> Optional[NamespaceNode]:
+        if not path:
+            return None
+        node = self._parents.get(path)
+        if node is None:
+            # The owner only matters for signing creates; reads don't need a keypair
+            owner = self.keypair.public_key() if self.keypair is not None else SYS_PROGRAM_ID
+            node = NamespaceNode(
+                owner_account=owner,
+                data=NamespaceData(field=path[-1], space=0),
+                parent=self._parent(path[:-1]))
+            self._parents[path] = node
+        return node
+
+    def _balance(self, space: int) -> int:
+        balance = self._rent.get(space)
+        if balance is None:
+            response = self.sender.request(
+                self.client, 'get_minimum_balance_for_rent_exemption', NAME_HEADER_LEN + space)
+            balance = self._rent[space] = response['result']
+        return balance
+
+    def node(self, record: Dict[str, Any]) -> NamespaceNode:
+        if 'field' not in record:
+            raise JobError("missing 'field'")
+        data = str(record.get('data', ''))
+        space = int(record.get('space', len(data.encode())))
+        owner = record.get('owner')
+        if owner is not None:
+            owner = PublicKey(owner)
+        elif self.keypair is not None:
+            owner = self.keypair.public_key()
+        else:
+            owner = SYS_PROGRAM_ID  # Only reads get this far without a keypair
+        balance = record.get('balance')
+        return NamespaceNode(
+            owner_account=owner,
+            data=NamespaceData(field=str(record['field']), space=space, data=data),
+            parent=self._parent(self.parent_path(record)),
+            class_account=PublicKey(record['class']) if record.get('class') else SYS_PROGRAM_ID,
+            balance=int(balance) if balance is not None else None)
+
+    def run(self, record: Dict[str, Any]) -> Any:
+        if _INVALID in record:
+            raise JobError(record[_INVALID])
+        op = record.get('op')
+        if op not in OPS:
+            raise JobError(f"unknown op {op!r}")
+        node = self.node(record)
+        if op == 'read':
+            return self._read(node)
+        signer = self._signer()
+        if op == 'create':
+            if node.balance is None:
+                node.balance = self._balance(node.data.space)
+            tx = Transaction()
+            tx.add(instruction.create_instruction(node, non_owner_funder=signer.public_key()))
+            tx.add(instruction.update_instruction(node))
+            return self.sender.send(self.client, tx, signer)['result']
+        if op == 'update':
+            if 'offset' in record:
+                return operations.update_bytes(
+                    self.client, node, signer, node.data.serialize(), offset=int(record['offset']),
+                    sender=self.sender)
+            return operations.update(self.client, node, signer, sender=self.sender)
+        if op == 'delete':
+            return operations.delete_name(self.client, node, signer, sender=self.sender)
+        if 'new_owner' not in record:
+            raise JobError("missing 'new_owner'")
+        return operations.transfer_name(
+            self.client, node, PublicKey(record['new_owner']), signer, sender=self.sender)
+
+    def _read(self, node: NamespaceNode) -> Optional[str]:
+        response = self.sender.request(self.client, 'get_account_info', node.account, encoding='base64')
+        value = response['result']['value']
+        if value is None:
+            return None
+        data = b64decode(value['data'][0])[NAME_HEADER_LEN:]
+        return data.rstrip(b'\0').decode('utf-8', errors='replace')
+
+    def result(self, line_no: int, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run one record, capturing its outcome and timing as a result line.
+        """
+        out: Dict[str, Any] = {'line': line_no}
+        if 'id' in record:
+            out['id'] = record['id']
+        out['op'] = record.get('op')
+        out['field'] = record.get('field')
+        start = time.perf_counter()
+        try:
+            out['result'] = self.run(record)
+            out['ok'] = True
+        except SolanaException as e:
+            error = name_service_error(e)
+            out['ok'] = False
+            out['error'] = error.message if error is not None else str(e)
+        except Exception as e:  # pylint: disable=broad-except
+            out['ok'] = False
+            out['error'] = f"{type(e).__name__}: {e}"
+        out['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        return out
+
+
+def _waves(runner: JobRunner, batch: List[Tuple[int, Dict[str, Any]]]) -> List[List[int]]:
+    # A job runs after earlier jobs in the batch on the same name or on its parent
+    waves: List[List[int]] = []
+    last_wave: Dict[Tuple[str, ...], int] = {}
+    for i, (_, record) in enumerate(batch):
+        try:
+            parent = runner.parent_path(record)
+        except TypeError:
+            parent = ()
+        key = parent + (str(record.get('field')),)
+        wave = max(last_wave.get(key, -1), last_wave.get(parent, -1)) + 1
+        last_wave[key] = wave
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append(i)
+    return waves
+
+
+def run_jobs(
+        runner: JobRunner,
+        records: Iterator[Tuple[int, Dict[str, Any]]],
+        output: IO[str],
+        concurrency: int=8,
+        batch_size: int=256,
+        checkpoint: Optional[str]=None,
+        ) -> Dict[str, int]:
+    """
+    Run job records in batches, streaming result lines to `output`.
+    """
+    resume_after = _load_checkpoint(checkpoint)
+    counts = {'ok': 0, 'failed': 0}
+    records = ((line_no, record) for line_no, record in records if line_no > resume_after)
+    with ThreadPoolExecutor(concurrency) as pool:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+            for wave in _waves(runner, batch):
+                for i, result in zip(wave, pool.map(lambda i: runner.result(*batch[i]), wave)):
+                    results[i] = result
+            for result in results:
+                counts['ok' if result['ok'] else 'failed'] += 1
+                output.write(json.dumps(result) + '\n')
+            output.flush()
+            if checkpoint:
+                _save_checkpoint(checkpoint, batch[-1][0])
+    return counts
+
+
+def _load_keypair(path: Optional[str]) -> Optional[Account]:
+    if not path:
+        return None
+    with open(os.path.expanduser(path), 'r') as f:
+        key = json.load(f)
+    return Account(key[:32])
+
+
+def _run(args: argparse.Namespace) -> int:
+    if args.simulate:
+        from sol_namespace.simulator import SimulatedClient
+        client = SimulatedClient()
+    else:
+        client = Client(args.url)
+    sender = Sender(rate=args.rate, max_in_flight=args.max_in_flight, max_retries=args.max_retries)
+    runner = JobRunner(client, sender, _load_keypair(args.keypair), path_sep=args.path_sep)
+    fmt = args.format or ('csv' if args.input.endswith('.csv') else 'jsonl')
+    stream = sys.stdin if args.input == '-' else open(args.input, 'r', newline='')
+    output = sys.stdout if args.output == '-' else open(args.output, 'a')
+    start = time.perf_counter()
+    try:
+        # Keep library messages out of the result stream
+        with redirect_stdout(sys.stderr):
+            counts = run_jobs(
+                runner, read_records(stream, fmt), output,
+                concurrency=args.concurrency, batch_size=args.batch_size, checkpoint=args.checkpoint)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    total = counts['ok'] + counts['failed']
+    print(f"{total} jobs ({counts['failed']} failed) in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if counts['failed'] else 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    from sol_namespace.simulator import NameServiceSimulator, serve
+    simulator = NameServiceSimulator(latency=args.latency, failure_rate=args.failure_rate)
+    print(f"Serving simulated JSON-RPC on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        serve(simulator, args.host, args.port, background=False)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv: Optional[List[str]]=None) -> int:
+    parser = argparse.ArgumentParser(prog='sol-namespace', description="Bulk SPL Name Service jobs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run create/update/read/delete/transfer jobs from JSONL or CSV.")
+    run.add_argument('input', nargs='?', default='-', help="Job file, or - for stdin (default).")
+    run.add_argument('--format', choices=('jsonl', 'csv'), help="Input format (default: by file extension, else jsonl).")
+    run.add_argument('--output', default='-', help="Append results here instead of stdout.")
+    run.add_argument('--url', default=os.getenv('SOL_ENDPOINT', DEVNET), help="JSON-RPC endpoint.")
+    run.add_argument('--simulate', action='store_true', help="Use an in-process simulator instead of --url.")
+    run.add_argument('--keypair', default=os.getenv('SOL_ACCOUNT'), help="Signer/funder keypair JSON file.")
+    run.add_argument('--concurrency', type=int, default=8)
+    run.add_argument('--batch-size', type=int, default=256)
+    run.add_argument('--checkpoint', help="Resume from, and record progress to, this file.")
+    run.add_argument('--rate', type=float, help="Max requests per second.")
+    run.add_argument('--max-in-flight', type=int, help="Max concurrent requests.")
+    run.add_argument('--max-retries', type=int, default=5)
+    run.add_argument('--path-sep', default='/', help="Separator for string parent paths.")
+    run.set_defaults(handler=_run)
+
+    serve = commands.add_parser('serve', help="Serve a simulated Name Service JSON-RPC node.")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8899)
+    serve.add_argument('--latency', type=float, default=0.0, help="Seconds added to each request.")
+    serve.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of requests failed with HTTP 429.")
+    serve.set_defaults(handler=_serve)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+Opt-in compression of name data.
+
+Wrap any `NamespaceData` in `CompressedData` to store its serialized form
+deflate-compressed, optionally against a preset dictionary trained on similar
+records with `train_dictionary`. Rent and update instruction sizes then scale
+with the compressed size.
+
+Encoded data starts with a small header, so `decode` tells compressed data
+apart from plain data and readers need no other configuration (besides
+registering any dictionary used):
+  - magic (2 bytes, `MAGIC`; 0xFE never starts UTF-8 text)
+  - method (u8): `STORED` or `DEFLATE`
+  - dictionary ID (u16), 0 for none
+  - uncompressed length (u32)
+Bytes after the compressed stream (e.g. zero padding up to `space`) are ignored.
+"""
+from __future__ import annotations
+import struct
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Optional, Any, Dict, Iterable, Type
+
+from sol_namespace.name_model import NamespaceData
+
+
+MAGIC = b'\xfeZ'
+STORED = 0
+DEFLATE = 1
+
+_HEADER = struct.Struct('<2sBHI')
+HEADER_LEN = _HEADER.size
+_WBITS = -15  # Raw deflate stream, without zlib's header and checksum
+
+_dictionaries: Dict[int, bytes] = {}
+
+
+class CodecError(ValueError):
+    """
+    Raised on malformed compressed data, or data compressed with an unregistered dictionary.
+    """
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    """
+    Stable, nonzero 16-bit ID of a preset dictionary.
+    """
+    return (zlib.crc32(dictionary) & 0xffff) or 1
+
+
+def register_dictionary(dictionary: bytes) -> int:
+    """
+    Make a preset dictionary available to `decode`, returning its ID.
+    """
+    dict_id = dictionary_id(dictionary)
+    existing = _dictionaries.get(dict_id)
+    if existing is not None and existing != dictionary:
+        raise CodecError(f"Dictionary ID {dict_id} is already registered to another dictionary")
+    _dictionaries[dict_id] = bytes(dictionary)
+    return dict_id
+
+
+def train_dictionary(samples: Iterable[bytes], size: int=4096, segment: int=8) -> bytes:
+    """
+    Build a preset dictionary of up to `size` bytes from sample records.
+
+    Picks the `segment`-byte substrings found in the most samples (repeats within
+    one sample are already handled by deflate itself), and puts the most common
+    last, where deflate references them most cheaply.
+    """
+    frequency: Counter = Counter()
+    for sample in samples:
+        sample = bytes(sample)
+        frequency.update({sample[i:i + segment] for i in range(len(sample) - segment + 1)})
+    dictionary = bytearray()
+    chosen = []
+    for piece, count in frequency.most_common():
+        if count < 2 or len(dictionary) + len(piece) > size:
+            break
+        if piece in dictionary:
+            continue
+        # Extend the previous piece instead where they overlap, as in running text
+        for overlap in range(segment - 1, 0, -1):
+            if dictionary.endswith(piece[:overlap]):
+                piece = piece[overlap:]
+                chosen[-1] += piece
+                break
+        else:
+            chosen.append(piece)
+        dictionary += piece
+    return b''.join(reversed(chosen))
+
+
+class Codec:
+    """
+    Compression settings for writing: deflate `level` and an optional preset dictionary.
+
+    Data that does not shrink is stored as is, so encoding never adds more than `HEADER_LEN` bytes.
+    """
+    def __init__(self, level: int=9, dictionary: Optional[bytes]=None):
+        self.level = level
+        self.dictionary = dictionary
+        self.dictionary_id = register_dictionary(dictionary) if dictionary else 0
+
+    def bound(self, n_bytes: int) -> int:
+        """
+        Largest possible encoded size of `n_bytes` of data.
+        """
+        return HEADER_LEN + n_bytes
+
+    def encode(self, raw_data: bytes) -> bytes:
+        if self.dictionary:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, _WBITS, 9, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, _WBITS, 9)
+        compressed = compressor.compress(raw_data) + compressor.flush()
+        if len(compressed) >= len(raw_data):
+            return _HEADER.pack(MAGIC, STORED, 0, len(raw_data)) + raw_data
+        return _HEADER.pack(MAGIC, DEFLATE, self.dictionary_id, len(raw_data)) + compressed
+
+
+default_codec = Codec()
+
+
+def is_compressed(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC and len(data) >= HEADER_LEN
+
+
+def decode(data: bytes) -> bytes:
+    """
+    Decompress encoded data, and pass any other data through unchanged.
+    """
+    if not is_compressed(data):
+        return data
+    _, method, dict_id, raw_len = _HEADER.unpack_from(data)
+    payload = data[HEADER_LEN:]
+    if method == STORED:
+        if len(payload) < raw_len:
+            raise CodecError("Truncated data")
+        return bytes(payload[:raw_len])
+    if method != DEFLATE:
+        raise CodecError(f"Unknown compression method {method}")
+    if raw_len == 0:
+        # `encode` stores empty data; zlib would also read a zero output limit as no limit
+        raise CodecError("Empty deflate stream")
+    if dict_id:
+        dictionary = _dictionaries.get(dict_id)
+        if dictionary is None:
+            raise CodecError(f"Data was compressed with unregistered dictionary {dict_id}")
+        decompressor = zlib.decompressobj(_WBITS, zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj(_WBITS)
+    try:
+        raw_data = decompressor.decompress(payload, raw_len)
+    except zlib.error as e:
+        raise CodecError(f"Corrupt compressed data: {e}") from e
+    if len(raw_data) != raw_len:
+        raise CodecError("Truncated data")
+    return raw_data
+
+
+class CompressedData(NamespaceData):
+    """
+    Stores another `NamespaceData`'s serialized form compressed.
+
+    `space` defaults to the encoded size of the current data; pass
+    `codec.bound(max_len)` instead to leave room for any data up to `max_len` bytes.
+    `data` reads and writes the wrapped data's `data`.
+
+    Instances are of `CompressedData.of(type(inner))`, so `deserialize` (and so
+    `get_name_data`) returns what the wrapped type's own `deserialize` does.
+    """
+    inner_cls: Type[NamespaceData] = NamespaceData
+
+    def __new__(cls, inner: Optional[NamespaceData]=None, *args, **kwargs):
+        if cls is CompressedData and inner is not None:
+            cls = cls.of(type(inner))
+        return super().__new__(cls)
+
+    def __init__(self, inner: NamespaceData, codec: Codec=default_codec, space: Optional[int]=None):
+        self.inner = inner
+        self.codec = codec
+        self.field = inner.field
+        self.space = len(self.serialize(check=False)) if space is None else space
+
+    def __reduce__(self):
+        return CompressedData, (self.inner, self.codec, self.space)
+
+    @staticmethod
+    def of(inner_cls: Type[NamespaceData]) -> Type[CompressedData]:
+        """
+        `CompressedData` subclass whose `deserialize` decompresses, then applies `inner_cls.deserialize`.
+        """
+        return _compressed_type(inner_cls)
+
+    @property
+    def data(self) -> Any:
+        return self.inner.data
+
+    @data.setter
+    def data(self, value: Any):
+        self.inner.data = value
+
+    def serialize(self, check: bool=True) -> bytes:
+        encoded = self.codec.encode(self.inner.serialize())
+        if check and len(encoded) > self.space:
+            raise ValueError(f"Compressed data of {len(encoded)} bytes exceeds space of {self.space} bytes")
+        return encoded
+
+    @classmethod
+    def deserialize(cls, raw_data: bytes) -> Any:
+        return cls.inner_cls.deserialize(decode(raw_data))
+
+
+@lru_cache(maxsize=None)
+def _compressed_type(inner_cls: Type[NamespaceData]) -> Type[CompressedData]:
+    if inner_cls is NamespaceData:
+        return CompressedData
+    return type(f"Compressed{inner_cls.__name__}", (CompressedData,), {
+        'inner_cls': inner_cls,
+        '__module__': __name__,
+        '__doc__': f"`CompressedData` wrapping `{inner_cls.__qualname__}`.",
+    })
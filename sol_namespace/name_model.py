@@ -2,16 +2,17 @@
 High level dataclasses for namespace trees on SPL Name Service.
 """
 from __future__ import annotations
-from typing import Optional, Any
+from functools import lru_cache
+from hashlib import sha256
+from typing import Optional, Any, Iterable, Iterator
 from dataclasses import dataclass
 
 from solana.publickey import PublicKey
 from solana.system_program import SYS_PROGRAM_ID
 from spl.name_service import name_program as name_prog
-from spl.name_service.utils import get_hashed_name
 
 
-@dataclass
+@dataclass(frozen=True)
 class NameProgram:
     """
     Name program and accompanied hardcoded hash prefix
@@ -19,6 +20,22 @@ class NameProgram:
     hash_prefix: str
     id: PublicKey
 
+    def hash_name(self, name_field: str) -> bytes:
+        """
+        Hash a name field, equivalent to `get_hashed_name(self.hash_prefix, name_field)`
+        but without re-hashing the prefix.
+        """
+        hasher = _prefix_hash(self.hash_prefix).copy()
+        hasher.update(name_field.encode())
+        return hasher.digest()
+
+
+@lru_cache(maxsize=None)
+def _prefix_hash(hash_prefix: str) -> Any:
+    # SHA-256 state that has already consumed `hash_prefix`. Kept off `NameProgram`
+    # so that programs (and nodes) stay picklable and copyable
+    return sha256(hash_prefix.encode())
+
 
 default_program = NameProgram(
     hash_prefix=name_prog.NAME_PROGRAM_HASH_PREFIX,
@@ -28,6 +45,23 @@ default_program = NameProgram(
 The SPL Name Service listed in official Solana repos.
 """
 
+NAME_HEADER_LEN = 96
+"""
+Bytes of parent, owner and class keys stored ahead of the data in every name account.
+"""
+
+
+def hash_names(program: NameProgram, fields: Iterable[str]) -> Iterator[bytes]:
+    """
+    Lazily hash many name fields under `program`, e.g. when building large trees.
+    """
+    prefix_hash = _prefix_hash(program.hash_prefix)
+    for name_field in fields:
+        hasher = prefix_hash.copy()
+        hasher.update(name_field.encode())
+        yield hasher.digest()
+
+
 @dataclass
 class NamespaceData:
     """
@@ -69,18 +103,17 @@ class NamespaceNode:
     # Calculated dynamically
     # hashed_name_field: bytes
     # account: PublicKey
+    # bump: int
 
     def __post_init__(self):
         if self.parent and self.parent.program != self.program:
             raise ValueError("Program ID must be same as parent node")
-        self.hashed_name_field = get_hashed_name(
-            self.program.hash_prefix,
-            self.data.field)
+        self.hashed_name_field = self.program.hash_name(self.data.field)
         if self.parent:
             parent_account = self.parent.account
         else:
             parent_account = SYS_PROGRAM_ID
-        self.account, _ = PublicKey.find_program_address(
+        self.account, self.bump = PublicKey.find_program_address(
             [
                 self.hashed_name_field,
                 bytes(self.class_account),
@@ -89,6 +122,33 @@ class NamespaceNode:
             self.program.id
             )
 
+    @classmethod
+    def restore(cls,
+            owner_account: PublicKey,
+            data: NamespaceData,
+            hashed_name_field: bytes,
+            account: PublicKey,
+            bump: int,
+            parent: Optional[NamespaceNode]=None,
+            class_account: PublicKey=SYS_PROGRAM_ID,
+            program: NameProgram=default_program,
+            balance: Optional[int]=None,
+            ) -> NamespaceNode:
+        """
+        Rebuild a node from previously derived values, skipping name hashing
+        and account address derivation.
+        """
+        node = cls.__new__(cls)
+        node.owner_account = owner_account
+        node.data = data
+        node.parent = parent
+        node.class_account = class_account
+        node.program = program
+        node.balance = balance
+        node.hashed_name_field = hashed_name_field
+        node.account = account
+        node.bump = bump
+        return node
 
     def create_child(self,
             data: NamespaceData,
@@ -17,7 +17,8 @@ from solana.publickey import PublicKey
 from solana.transaction import Transaction
 from solana.system_program import SYS_PROGRAM_ID
 
-from sol_namespace.name_model import NamespaceNode
+from sol_namespace.name_model import NamespaceNode, NAME_HEADER_LEN
+from sol_namespace.sender import Sender, NameServiceException, default_sender, name_service_error, rpc_error
 from sol_namespace import instruction
 
 
@@ -32,12 +33,15 @@ def create(
         funder: Account,
         *signers: Account,
         populate: bool=True,
-        raw: bool=False
-        ) -> Optional[Operation]:
+        raw: bool=False,
+        sender: Optional[Sender]=None,
+        ) -> Operation:
     """
     Create a name account on chain. By default, also populate it with data.
 
     Optionally, return a signed raw transaction instead of directly sending it.
+    Raises `NameServiceException` if the program rejects it, e.g. because the name
+    already exists.
     """
     tx = Transaction()
     tx.add(instruction.create_instruction(name))
@@ -51,14 +55,12 @@ def create(
         return tx.serialize()
     # Otherwise just send the transaction
     try:
-        response = client.send_transaction(tx, funder)
+        response = (sender or default_sender).send(client, tx, funder, *signers)
     except SolanaException as e:
-        logs = e.data.get('data', {}).get('logs', [])
-        # TODO More efficient/informative error parsing here
-        if 'Program log: Instruction: Create' in logs and \
-            'Program log: The given name account already exists.' in logs:
-            print("Error -- Name Create: name account already exists")
-        return None
+        error = name_service_error(e)
+        if error is None:
+            raise
+        raise NameServiceException(error, rpc_error(e)) from e
     return response['result']
 
 
@@ -66,7 +68,8 @@ def update(
         client: Client,
         name: NamespaceNode,
         signer: Account,
-        raw=False) -> Optional[Operation]:
+        raw=False,
+        sender: Optional[Sender]=None) -> Optional[Operation]:
     """
     Repopulate the entirety of the data under a name account.
 
@@ -84,7 +87,7 @@ def update(
         tx.sign(signer)
         return tx.serialize()
 
-    response = client.send_transaction(tx, signer)
+    response = (sender or default_sender).send(client, tx, signer)
     return response['result']
 
 
@@ -94,7 +97,8 @@ def update_bytes(
         signer: Account,
         input_data: bytes,
         offset: int=0,
-        raw=False) -> Optional[Operation]:
+        raw=False,
+        sender: Optional[Sender]=None) -> Optional[Operation]:
     """
     Custom update to the data under a name account.
     Requires specifying the starting offset byte-index, and the raw bytes to write.
@@ -114,7 +118,7 @@ def update_bytes(
         tx.sign(signer)
         return tx.serialize()
 
-    response = client.send_transaction(tx, signer)
+    response = (sender or default_sender).send(client, tx, signer)
     return response['result']
 
 
@@ -123,7 +127,8 @@ def delete_name(
         name: NamespaceNode,
         signer: Account,  # must correspond to name.owner_account
         refund_to: PublicKey=None,
-        raw: bool=False) -> Optional[Operation]:
+        raw: bool=False,
+        sender: Optional[Sender]=None) -> Optional[Operation]:
     """
     Delete a namespace node.
     """
@@ -135,7 +140,7 @@ def delete_name(
         tx.sign(signer)
         return tx.serialize()
 
-    response = client.send_transaction(tx, signer)
+    response = (sender or default_sender).send(client, tx, signer)
     return response['result']
 
 
@@ -145,7 +150,8 @@ def transfer_name(
         new_owner: PublicKey,
         signer: Account,  # must correspond to name.owner_account
         class_account_signer: Account=None,
-        raw: bool=False) -> Optional[Operation]:
+        raw: bool=False,
+        sender: Optional[Sender]=None) -> Optional[Operation]:
     """
     Transfer a namespace node to a new owner.
     """
@@ -161,25 +167,29 @@ def transfer_name(
 
     if class_account_signer is not None:
         assert name.class_account != SYS_PROGRAM_ID, "Cannot specify class account signer on this name"
-        response = client.send_transaction(tx, signer, class_account_signer)
+        response = (sender or default_sender).send(client, tx, signer, class_account_signer)
     else:
-        response = client.send_transaction(tx, signer)
+        response = (sender or default_sender).send(client, tx, signer)
     return response['result']
 
 
 
-def get_name_data(client: Client, name: NamespaceNode) -> Any:
+def get_name_data(
+        client: Client,
+        name: NamespaceNode,
+        sender: Optional[Sender]=None) -> Any:
     """
     Look up account data, deserialize it.
     """
-    response = client.get_account_info(name.account, encoding='jsonParsed')
+    response = (sender or default_sender).request(
+        client, 'get_account_info', name.account, encoding='jsonParsed')
     value = response['result']['value']
     if value is None:
         print(f"{name.account} not found")
         return None
     data = value['data'][0]
     data = b64decode(data)
-    data = data[96:]
+    data = data[NAME_HEADER_LEN:]
     return type(name.data).deserialize(data)
 
 
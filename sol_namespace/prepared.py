@@ -0,0 +1,98 @@
+"""
+Precompiled update transactions for names that are updated over and over.
+
+`operations.update` rebuilds and re-serializes a whole `Transaction` per call.
+A `PreparedUpdate` compiles the message once into a preallocated buffer, and per
+update only patches in the blockhash and data bytes before signing.
+"""
+import struct
+import threading
+from typing import Optional
+
+from base58 import b58decode
+
+from solana.account import Account
+from solana.rpc.api import Client
+from solana.system_program import SYS_PROGRAM_ID
+from solana.utils import shortvec_encoding as shortvec
+
+from sol_namespace.name_model import NamespaceNode
+from sol_namespace.sender import Sender, default_sender
+
+
+_UPDATE = 1  # Name Service instruction tag
+_SIGNATURE_OFFSET = 1  # After the compact-u16 signature count
+_MESSAGE_OFFSET = _SIGNATURE_OFFSET + 64
+# Message: header (3), key count (1), signer, name account and program keys (3 * 32)
+_BLOCKHASH_OFFSET = _MESSAGE_OFFSET + 3 + 1 + 3 * 32
+# Instruction count (1), program index (1), account count (1), account indices (2)
+_DATA_LEN_OFFSET = _BLOCKHASH_OFFSET + 32 + 5
+
+
+class PreparedUpdate:
+    """
+    Reusable, precompiled update transaction for one `NamespaceNode` and signer.
+
+    The signer is the name's class account if it has one, otherwise its owner,
+    and also pays the transaction fee. Safe to share between threads; compiles
+    are serialized on the shared buffer.
+    """
+    def __init__(self, name: NamespaceNode, signer: Account):
+        if name.class_account != SYS_PROGRAM_ID:
+            assert signer.public_key() == name.class_account
+        else:
+            assert signer.public_key() == name.owner_account
+        self.name = name
+        self.signer = signer
+        max_data = 9 + name.data.space
+        self._buffer = bytearray(_DATA_LEN_OFFSET + len(shortvec.encode_length(max_data)) + max_data)
+        self._buffer[0] = 1  # One signature
+        message = bytearray()
+        message += bytes([1, 0, 1])  # One signer, no read-only signers, one read-only key (the program)
+        message += shortvec.encode_length(3)
+        message += bytes(signer.public_key())
+        message += bytes(name.account)
+        message += bytes(name.program.id)
+        message += bytes(32)  # Blockhash placeholder
+        message += shortvec.encode_length(1)
+        message += bytes([2])  # Program key index
+        message += shortvec.encode_length(2)
+        message += bytes([1, 0])  # Name account, then signer
+        self._buffer[_MESSAGE_OFFSET:_DATA_LEN_OFFSET] = message
+        self._blockhash: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def compile(self, recent_blockhash: str, input_data: Optional[bytes]=None, offset: int=0) -> bytes:
+        """
+        Signed wire transaction writing `input_data` (by default the serialized
+        name data) at `offset`.
+        """
+        if input_data is None:
+            input_data = self.name.data.serialize()
+        assert offset + len(input_data) <= self.name.data.space
+        buffer = self._buffer
+        with self._lock:
+            if recent_blockhash != self._blockhash:
+                buffer[_BLOCKHASH_OFFSET:_BLOCKHASH_OFFSET + 32] = b58decode(recent_blockhash)
+                self._blockhash = recent_blockhash
+            data_len = shortvec.encode_length(9 + len(input_data))
+            pos = _DATA_LEN_OFFSET + len(data_len)
+            buffer[_DATA_LEN_OFFSET:pos] = data_len
+            struct.pack_into('<BII', buffer, pos, _UPDATE, offset, len(input_data))
+            end = pos + 9 + len(input_data)
+            buffer[pos + 9:end] = input_data
+            buffer[_SIGNATURE_OFFSET:_MESSAGE_OFFSET] = self.signer.sign(bytes(buffer[_MESSAGE_OFFSET:end])).signature
+            return bytes(buffer[:end])
+
+    def send(
+            self,
+            client: Client,
+            input_data: Optional[bytes]=None,
+            offset: int=0,
+            sender: Optional[Sender]=None) -> str:
+        """
+        Send an update, as `operations.update`/`operations.update_bytes` would.
+        """
+        response = (sender or default_sender).submit(
+            client, lambda blockhash: self.compile(blockhash, input_data, offset))
+        return response['result']
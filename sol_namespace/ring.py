@@ -0,0 +1,235 @@
+"""
+Append-only ring buffers of entries in a single name account.
+
+`RingBufferData` lays out a fixed number of fixed-size slots behind a small
+header. `append` writes just the new entry's slot and the header's head
+sequence number, in one transaction, instead of rewriting the whole record.
+`read_latest` returns the latest entries from a single account fetch.
+
+Layout (little-endian):
+  - Header: magic, version, reserved, slot count (u16), slot size (u16) and
+    head (u64), the sequence number of the next entry. The entry count is
+    `min(head, slots)`.
+  - Slots: entry `seq` lives in slot `seq % slots`, as its sequence number (u64),
+    writer nonce (u32), length (u16) and up to `slot_size` bytes of entry.
+Readers take the head as the larger of the header's and one past the latest
+slot's sequence number, so a stale header cannot hide newer entries.
+
+The Name Service program has no compare-and-swap, so concurrent appenders are
+handled optimistically: after sending, `append` re-reads the account and retries
+with a fresh head if another appender took the same slot. An append that landed
+behind newer entries (moving the header's head back) raises `ConflictError`.
+This narrows the race but cannot close it: an appender that read a stale head can
+still overwrite an entry after its writer verified it. Route appends through a
+single writer, or give each writer its own ring buffer, where no entry may be lost.
+"""
+from __future__ import annotations
+import os
+import struct
+import time
+from base64 import b64decode
+from dataclasses import dataclass
+from typing import Optional, Dict, Iterable, List
+
+from solana.account import Account
+from solana.rpc.api import Client
+from solana.transaction import Transaction
+
+from sol_namespace.name_model import NamespaceData, NamespaceNode, NAME_HEADER_LEN
+from sol_namespace.sender import Sender, default_sender
+from sol_namespace import instruction
+
+
+MAGIC = b'RB'
+VERSION = 1
+
+# magic, version, reserved, slot count, slot size, head
+_HEADER = struct.Struct('<2sBBHHQ')
+_HEAD = struct.Struct('<Q')
+_HEAD_OFFSET = _HEADER.size - _HEAD.size
+# sequence number, writer nonce, entry length
+_SLOT = struct.Struct('<QIH')
+
+
+class RingBufferError(ValueError):
+    """
+    Raised on data that is not a ring buffer, or entries that do not fit a slot.
+    """
+
+
+class ConflictError(RuntimeError):
+    """
+    Raised when an append keeps losing races with concurrent appenders.
+    """
+
+
+@dataclass
+class RingState:
+    """
+    Parsed contents of a ring buffer account.
+    """
+    slots: int
+    slot_size: int
+    head: int  # Sequence number of the next entry
+    entries: Dict[int, bytes]  # Entries by sequence number, including any outside the window
+    nonces: Dict[int, int]  # Writer nonces by sequence number
+    header_head: int  # As stored in the header, behind `head` after a stale append
+
+    def latest(self, n: Optional[int]=None) -> List[bytes]:
+        """
+        Up to the last `n` entries (all by default), oldest first.
+        """
+        first = max(0, self.head - self.slots)
+        if n is not None:
+            first = max(first, self.head - n)
+        return [self.entries[seq] for seq in range(first, self.head) if seq in self.entries]
+
+
+def slot_offset(slots: int, slot_size: int, seq: int) -> int:
+    """
+    Offset in the name data of the slot holding entry `seq`.
+    """
+    return _HEADER.size + (seq % slots) * (_SLOT.size + slot_size)
+
+
+def parse(raw_data: bytes) -> RingState:
+    """
+    Parse ring buffer name data.
+    """
+    if len(raw_data) < _HEADER.size:
+        raise RingBufferError("Not a ring buffer")
+    magic, version, _, slots, slot_size, head = _HEADER.unpack_from(raw_data)
+    if magic != MAGIC:
+        raise RingBufferError("Not a ring buffer")
+    if version != VERSION:
+        raise RingBufferError(f"Unsupported ring buffer version {version}")
+    entries: Dict[int, bytes] = {}
+    nonces: Dict[int, int] = {}
+    latest = head
+    for i in range(slots):
+        offset = _HEADER.size + i * (_SLOT.size + slot_size)
+        if offset + _SLOT.size > len(raw_data):
+            break  # Unwritten slots, as in `RingBufferData.serialize`
+        seq, nonce, length = _SLOT.unpack_from(raw_data, offset)
+        if seq % slots == i and length <= slot_size and offset + _SLOT.size + length <= len(raw_data):
+            start = offset + _SLOT.size
+            entries[seq] = bytes(raw_data[start:start + length])
+            nonces[seq] = nonce
+            if (seq, nonce, length) != (0, 0, 0):  # Not an unwritten slot
+                latest = max(latest, seq + 1)
+    return RingState(slots, slot_size, latest, entries, nonces, head)
+
+
+class RingBufferData(NamespaceData):
+    """
+    Ring buffer of up to `slots` entries of up to `slot_size` bytes each.
+
+    `data` holds the initial entries (bytes), oldest first, written on create;
+    afterwards use `append`. Keep initial entries few, as they are written in
+    the create transaction. `deserialize` returns the entries, oldest first.
+    """
+    def __init__(self, field: str, slots: int, slot_size: int, entries: Iterable[bytes]=()):
+        if not 0 < slots < 2 ** 16 or not 0 < slot_size < 2 ** 16:
+            raise RingBufferError("Slot count and size must be between 1 and 65535")
+        self.field = field
+        self.slots = slots
+        self.slot_size = slot_size
+        self.space = _HEADER.size + slots * (_SLOT.size + slot_size)
+        self.data = list(entries)
+
+    def serialize(self) -> bytes:
+        """
+        The header and initial entries only, up to the end of the last one written.
+        Name accounts start zeroed, so the remaining (empty) slots need no writing
+        and creating even a large ring buffer fits in one transaction.
+        """
+        head = len(self.data)
+        buffer = bytearray(self.space)
+        _HEADER.pack_into(buffer, 0, MAGIC, VERSION, 0, self.slots, self.slot_size, head)
+        end = _HEADER.size
+        for seq in range(max(0, head - self.slots), head):
+            slot = _slot(seq, 0, self.data[seq], self.slot_size)
+            offset = slot_offset(self.slots, self.slot_size, seq)
+            buffer[offset:offset + len(slot)] = slot
+            end = max(end, offset + len(slot))
+        return bytes(buffer[:end])
+
+    @classmethod
+    def deserialize(cls, raw_data: bytes) -> List[bytes]:
+        return parse(raw_data).latest()
+
+
+def _slot(seq: int, nonce: int, entry: bytes, slot_size: int) -> bytes:
+    if len(entry) > slot_size:
+        raise RingBufferError(f"Entry of {len(entry)} bytes exceeds slot size of {slot_size} bytes")
+    return _SLOT.pack(seq, nonce, len(entry)) + entry
+
+
+def _fetch(client: Client, node: NamespaceNode, sender: Sender) -> RingState:
+    response = sender.request(client, 'get_account_info', node.account, encoding='base64')
+    value = response['result']['value']
+    if value is None:
+        raise RingBufferError(f"{node.account} not found")
+    return parse(b64decode(value['data'][0])[NAME_HEADER_LEN:])
+
+
+def read_latest(
+        client: Client,
+        node: NamespaceNode,
+        n: Optional[int]=None,
+        sender: Optional[Sender]=None) -> List[bytes]:
+    """
+    The last `n` entries (all by default) of a ring buffer name, oldest first.
+    """
+    return _fetch(client, node, sender or default_sender).latest(n)
+
+
+def append(
+        client: Client,
+        node: NamespaceNode,
+        signer: Account,
+        entry: bytes,
+        sender: Optional[Sender]=None,
+        verify: bool=True,
+        retries: int=5,
+        timeout: float=30.0,
+        poll_interval: float=0.5) -> int:
+    """
+    Append an entry to a ring buffer name, returning its sequence number.
+
+    Signer is either the owner of the account, or the class account if it's not
+    default. With `verify`, waits until the entry is visible and retries if a
+    concurrent appender overwrote it, raising `ConflictError` after `retries` attempts,
+    or at once if the entry landed behind newer ones (its head was stale).
+    """
+    sender = sender or default_sender
+    for _ in range(retries):
+        state = _fetch(client, node, sender)
+        seq = state.head
+        nonce = int.from_bytes(os.urandom(4), 'little')
+        tx = Transaction()
+        tx.add(
+            instruction.update_instruction(
+                node,
+                offset=slot_offset(state.slots, state.slot_size, seq),
+                input_data=_slot(seq, nonce, entry, state.slot_size)),
+            instruction.update_instruction(node, offset=_HEAD_OFFSET, input_data=_HEAD.pack(seq + 1)),
+            )
+        sender.send(client, tx, signer)
+        if not verify:
+            return seq
+        deadline = time.monotonic() + timeout
+        while True:
+            state = _fetch(client, node, sender)
+            landed = state.nonces.get(seq) == nonce
+            if landed and state.header_head == seq + 1 < state.head:
+                # Our head write went backward, so our entry may have overwritten a newer one
+                raise ConflictError(f"Append to {node.account} landed at stale sequence number {seq}")
+            if state.head > seq and (landed or state.head - seq >= state.slots):
+                return seq  # Visible, or already rotated out by later entries
+            if landed or state.head > seq:
+                break  # Lost the slot or the head to a concurrent appender
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Append to {node.account} not visible after {timeout}s")
+            time.sleep(poll_interval)
+    raise ConflictError(f"Append to {node.account} conflicted {retries} times")
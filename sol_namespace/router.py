@@ -0,0 +1,270 @@
+"""
+Route JSON-RPC requests across several endpoints.
+
+An `RpcRouter` can be passed anywhere a `solana.rpc.api.Client` is accepted.
+Reads go to the fastest healthy endpoint that is not lagging behind the others,
+and a hedged duplicate read goes to the next endpoint if the first is slow to answer.
+Transactions are broadcast to several endpoints at once. Endpoints that keep
+failing are ejected by a circuit breaker, and retried after a cooldown.
+Requests are rate limited per endpoint, with the buckets of the router's `Sender`.
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Union, Any, Callable, Dict, List, Sequence
+
+from solana.account import Account
+from solana.publickey import PublicKey
+from solana.rpc.api import Client
+from solana.transaction import Transaction
+
+from sol_namespace.sender import Sender, ErrorKind, classify, default_sender, endpoint_of, raise_for_error, rpc_error
+
+
+_TRANSIENT = (ErrorKind.RETRY, ErrorKind.RATE_LIMITED)
+
+
+def _answered(exception: Exception) -> bool:
+    """
+    Whether an endpoint answered with a well-formed JSON-RPC error that any other
+    endpoint would repeat. HTTP, transport and decoding errors (e.g. from a wrong
+    URL or a dead proxy) and transient RPC errors count against the endpoint.
+    """
+    error = rpc_error(exception)
+    return error is not None and 'code' in error and classify(exception) not in _TRANSIENT
+
+
+def _method(client: Any, method_name: str) -> Callable:
+    method = getattr(client, method_name, None)
+    if method is None and method_name == 'get_multiple_accounts':
+        # solana-py's Client has no getMultipleAccounts wrapper
+        def method(pubkeys: List[Union[PublicKey, str]], encoding: str='base64') -> dict:
+            return client._provider.make_request(
+                'getMultipleAccounts', [str(key) for key in pubkeys], {'encoding': encoding})
+    return method or getattr(client, method_name)
+
+
+class Endpoint:
+    """
+    One RPC endpoint and its health: latency, slot and circuit breaker state.
+    """
+    def __init__(self, client: Any):
+        self.client = client
+        self.name = endpoint_of(client)
+        self.latency: Optional[float] = None  # Moving average, seconds
+        self.slot: Optional[int] = None
+        self.failures = 0  # Consecutive failures
+        self.opened_at: Optional[float] = None  # When the circuit breaker tripped
+
+    def available(self, now: float, cooldown: float) -> bool:
+        """
+        Closed circuit, or open for at least `cooldown` seconds (half-open: allow a trial).
+        """
+        return self.opened_at is None or now - self.opened_at >= cooldown
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'endpoint': self.name,
+            'latency': self.latency,
+            'slot': self.slot,
+            'failures': self.failures,
+            'open': self.opened_at is not None,
+        }
+
+
+class RpcRouter:
+    """
+    Client-compatible router over several RPC endpoints (URLs or clients).
+
+    - `hedge_after`: seconds to wait on a read before also asking the next endpoint.
+    - `broadcast`: number of endpoints each transaction is sent to.
+    - `max_slot_lag`: endpoints further behind the highest seen slot are skipped.
+    - `failure_threshold`, `cooldown`: consecutive failures that eject
+      an endpoint, and seconds before it is tried again.
+    - `probe_interval`: seconds between background slot probes, `None` to only
+      probe on `refresh()`.
+    - `sender`: whose per-endpoint rate limits apply to each endpoint. Senders
+      using the router leave rate limiting to it.
+    """
+    throttles_endpoints = True
+    def __init__(
+            self,
+            endpoints: Sequence[Union[str, Any]],
+            hedge_after: float=0.25,
+            broadcast: int=2,
+            max_slot_lag: int=50,
+            failure_threshold: int=3,
+            cooldown: float=30.0,
+            probe_interval: Optional[float]=10.0,
+            smoothing: float=0.2,
+            max_workers: int=32,
+            sender: Optional[Sender]=None,
+            ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints = [Endpoint(Client(e) if isinstance(e, str) else e) for e in endpoints]
+        self.endpoint_uri = "router:" + ",".join(e.name for e in self.endpoints)
+        self.hedge_after = hedge_after
+        self.broadcast = broadcast
+        self.max_slot_lag = max_slot_lag
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe_interval = probe_interval
+        self.smoothing = smoothing
+        self.sender = sender or default_sender
+        self.stats = Counter()
+        self._pool = ThreadPoolExecutor(max_workers)
+        self._lock = threading.Lock()
+        self._last_probe = 0.0
+
+    # Health tracking
+
+    def _record(self, endpoint: Endpoint, elapsed: Optional[float]):
+        with self._lock:
+            if elapsed is None:
+                endpoint.failures += 1
+                if endpoint.failures >= self.failure_threshold:
+                    if endpoint.opened_at is None:
+                        self.stats['ejected'] += 1
+                    endpoint.opened_at = time.monotonic()
+                return
+            endpoint.failures = 0
+            endpoint.opened_at = None
+            if endpoint.latency is None:
+                endpoint.latency = elapsed
+            else:
+                endpoint.latency += self.smoothing * (elapsed - endpoint.latency)
+
+    def _call(self, endpoint: Endpoint, method_name: str, *args, **kwargs) -> Any:
+        self.sender.throttle(endpoint.name)
+        start = time.monotonic()
+        try:
+            response = _method(endpoint.client, method_name)(*args, **kwargs)
+            raise_for_error(response)
+        except Exception as e:
+            self._record(endpoint, time.monotonic() - start if _answered(e) else None)
+            raise
+        self._record(endpoint, time.monotonic() - start)
+        return response
+
+    def refresh(self):
+        """
+        Probe every endpoint's slot (and latency) now.
+        """
+        with self._lock:
+            self._last_probe = time.monotonic()
+
+        def probe(endpoint: Endpoint):
+            try:
+                endpoint.slot = self._call(endpoint, 'get_slot')['result']
+            except Exception:  # pylint: disable=broad-except
+                pass
+        list(self._pool.map(probe, self.endpoints))
+
+    def _maybe_probe(self):
+        if self.probe_interval is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_probe < self.probe_interval:
+                return
+            self._last_probe = now
+        self._pool.submit(self.refresh)
+
+    def ranked(self) -> List[Endpoint]:
+        """
+        Endpoints in order of preference: available, caught up, fastest first.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.available(now, self.cooldown)]
+            if not candidates:
+                # Everything is ejected; fail open rather than not trying at all
+                candidates = sorted(self.endpoints, key=lambda e: e.opened_at)
+            slots = [e.slot for e in candidates if e.slot is not None]
+            if slots:
+                head = max(slots)
+                caught_up = [e for e in candidates if e.slot is None or head - e.slot <= self.max_slot_lag]
+                candidates = caught_up or candidates
+            # Recently failing endpoints last, unmeasured ones first so that they get measured
+            return sorted(candidates, key=lambda e: (e.failures > 0, -1.0 if e.latency is None else e.latency))
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [endpoint.status() for endpoint in self.endpoints]
+
+    # Routing
+
+    def _read(self, method_name: str, *args, **kwargs) -> Any:
+        self._maybe_probe()
+        candidates = self.ranked()
+        pending = {}
+        errors = []
+
+        def launch():
+            endpoint = candidates.pop(0)
+            pending[self._pool.submit(self._call, endpoint, method_name, *args, **kwargs)] = endpoint
+
+        launch()
+        while pending:
+            done, _ = wait(pending, timeout=self.hedge_after if candidates else None, return_when=FIRST_COMPLETED)
+            if not done:
+                self.stats['hedged'] += 1
+                launch()
+                continue
+            for future in done:
+                del pending[future]
+                try:
+                    return future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    if _answered(e):
+                        raise  # The request itself failed; another endpoint would agree
+                    errors.append(e)
+            if candidates:
+                launch()
+        raise errors[-1]
+
+    def _broadcast(self, method_name: str, *args, **kwargs) -> Any:
+        targets = self.ranked()[:max(1, self.broadcast)]
+        futures = [self._pool.submit(self._call, endpoint, method_name, *args, **kwargs) for endpoint in targets]
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    errors.append(e)
+        # Prefer an error from an endpoint that actually processed the transaction
+        errors.sort(key=lambda e: not _answered(e))
+        raise errors[0]
+
+    def get_account_info(self, pubkey: Union[PublicKey, str], *args, **kwargs) -> dict:
+        return self._read('get_account_info', pubkey, *args, **kwargs)
+
+    def get_multiple_accounts(self, pubkeys: List[Union[PublicKey, str]], *args, **kwargs) -> dict:
+        return self._read('get_multiple_accounts', pubkeys, *args, **kwargs)
+
+    def get_recent_blockhash(self, *args, **kwargs) -> dict:
+        return self._read('get_recent_blockhash', *args, **kwargs)
+
+    def get_minimum_balance_for_rent_exemption(self, usize: int, *args, **kwargs) -> dict:
+        return self._read('get_minimum_balance_for_rent_exemption', usize, *args, **kwargs)
+
+    def get_slot(self, *args, **kwargs) -> dict:
+        return self._read('get_slot', *args, **kwargs)
+
+    def send_raw_transaction(self, txn: Union[bytes, str], *args, **kwargs) -> dict:
+        return self._broadcast('send_raw_transaction', txn, *args, **kwargs)
+
+    def send_transaction(self, txn: Transaction, *signers: Account, **kwargs) -> dict:
+        txn.recent_blockhash = self.get_recent_blockhash()['result']['value']['blockhash']
+        txn.sign(*signers)
+        return self.send_raw_transaction(txn.serialize(), **kwargs)
+
+    def close(self, wait: bool=False):
+        """
+        Stop the worker threads, with `wait` after any requests still in flight.
+        """
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,389 @@
+"""
+Rate-limited, retrying transaction sender used by every `operations` function.
+
+A `Sender` rate limits requests with a token bucket per RPC endpoint, caps the
+number of requests in flight, retries transient failures with jittered exponential
+backoff, and re-signs transactions with a fresh blockhash when theirs expires.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, Callable, Any, Dict, List, Tuple
+
+import requests
+from base58 import b58encode
+
+from solana.account import Account
+from solana.rpc.exception import SolanaException
+from solana.transaction import Transaction
+from solana.utils import shortvec_encoding as shortvec
+
+
+class ErrorKind(Enum):
+    """
+    How a failed request should be handled.
+    """
+    RETRY = 'retry'  # Transient, retry after backoff
+    RATE_LIMITED = 'rate_limited'  # Throttled, retry after backoff
+    EXPIRED = 'expired'  # Blockhash expired, re-sign and retry
+    PROCESSED = 'processed'  # Already landed, nothing to do
+    FATAL = 'fatal'  # Will fail again, give up
+
+
+@dataclass(frozen=True)
+class NameServiceError:
+    """
+    A failure reported by SPL Name Service in a transaction's logs.
+    """
+    instruction: Optional[str]  # e.g. "Create"
+    code: str  # e.g. "name_exists"
+    message: str
+
+
+class NameServiceException(SolanaException):
+    """
+    A transaction rejected by SPL Name Service; the parsed failure is `error`.
+    """
+    def __init__(self, error: NameServiceError, data: Optional[dict]=None):
+        super().__init__(f"Name {error.instruction}: {error.message}")
+        self.data = data
+        self.error = error
+
+
+_LOG_PREFIX = "Program log: "
+_INSTRUCTION_PREFIX = "Program log: Instruction: "
+
+NAME_SERVICE_ERRORS = {
+    _LOG_PREFIX + message: code for message, code in [
+        ("The given name account already exists.", 'name_exists'),
+        ("The given name account is incorrect.", 'incorrect_name_account'),
+        ("The given name class is not a signer.", 'class_not_signer'),
+        ("The given parent name account owner is not a signer.", 'parent_owner_not_signer'),
+        ("The given parent name account owner is not correct.", 'incorrect_parent_owner'),
+        ("The owner cannot be `Pubkey::default()`.", 'default_owner'),
+        ("The given name class account is incorrect or not a signer.", 'incorrect_class'),
+        ("The given name owner account is incorrect or not a signer.", 'incorrect_owner'),
+        ("The given name owner is incorrect or not a signer.", 'incorrect_owner'),
+        ("The given data is out of bounds.", 'out_of_bounds'),
+    ]
+}
+"""
+Name Service failure log lines, mapped to short error codes.
+"""
+
+# JSON-RPC error codes worth retrying: node behind/unhealthy, slot skipped or unavailable, etc.
+_RETRYABLE_RPC_CODES = {-32004, -32005, -32007, -32009, -32014, -32016, -32603, 429}
+# Transaction errors that can clear up on their own
+_RETRYABLE_TX_ERRORS = {'AccountInUse', 'AccountLoadedTwice', 'WouldExceedMaxBlockCostLimit',
+                        'WouldExceedMaxAccountCostLimit', 'ClusterMaintenance'}
+_RETRYABLE_HTTP_STATUSES = {408, 500, 502, 503, 504}
+# Seconds to remember sent signatures; a blockhash is valid for about 150 slots (~60-90s)
+_SIGNATURE_TTL = 120.0
+# Seconds to wait for a new blockhash; one is produced every slot (~0.4s)
+_BLOCKHASH_WAIT = 30.0
+
+
+def parse_name_service_logs(logs: List[str]) -> Optional[NameServiceError]:
+    """
+    Find the Name Service failure in a transaction's logs, if any.
+    """
+    for i in range(len(logs) - 1, -1, -1):
+        code = NAME_SERVICE_ERRORS.get(logs[i])
+        if code is None:
+            continue
+        instruction = None
+        for line in reversed(logs[:i]):
+            if line.startswith(_INSTRUCTION_PREFIX):
+                instruction = line[len(_INSTRUCTION_PREFIX):]
+                break
+        return NameServiceError(instruction, code, logs[i][len(_LOG_PREFIX):])
+    return None
+
+
+def rpc_error(exception: Exception) -> Optional[dict]:
+    """
+    The JSON-RPC error object carried by a `SolanaException`, if any.
+    """
+    data = getattr(exception, 'data', None)
+    return data if isinstance(data, dict) else None
+
+
+def name_service_error(exception: Exception) -> Optional[NameServiceError]:
+    """
+    The Name Service failure behind a failed `send_transaction`, if any.
+    """
+    error = rpc_error(exception) or {}
+    logs = (error.get('data') or {}).get('logs') or []
+    return parse_name_service_logs(logs)
+
+
+def classify(exception: Exception) -> ErrorKind:
+    """
+    Decide whether a failed request is worth retrying, and how.
+    """
+    if isinstance(exception, requests.HTTPError):
+        status = exception.response.status_code if exception.response is not None else None
+        if status == 429:
+            return ErrorKind.RATE_LIMITED
+        if status in _RETRYABLE_HTTP_STATUSES:
+            return ErrorKind.RETRY
+        return ErrorKind.FATAL
+    if isinstance(exception, (requests.ConnectionError, requests.Timeout)):
+        return ErrorKind.RETRY
+    error = rpc_error(exception)
+    if error is None:
+        return ErrorKind.FATAL
+    if error.get('code') == 429:
+        return ErrorKind.RATE_LIMITED
+    err = (error.get('data') or {}).get('err')
+    if err == 'BlockhashNotFound':
+        return ErrorKind.EXPIRED
+    if err == 'AlreadyProcessed':
+        return ErrorKind.PROCESSED
+    if (isinstance(err, str) and err in _RETRYABLE_TX_ERRORS) or error.get('code') in _RETRYABLE_RPC_CODES:
+        return ErrorKind.RETRY
+    return ErrorKind.FATAL
+
+
+def endpoint_of(client: Any) -> str:
+    """
+    Identify the RPC endpoint behind a client, for per-endpoint rate limiting.
+    """
+    endpoint = getattr(client, 'endpoint_uri', None)
+    if endpoint is None:
+        endpoint = getattr(getattr(client, '_provider', None), 'endpoint_uri', None)
+    return str(endpoint) if endpoint is not None else f"client-{id(client)}"
+
+
+def _signature(raw_tx: bytes) -> str:
+    _, offset = shortvec.decode_length(raw_tx)
+    return b58encode(raw_tx[offset:offset + 64]).decode()
+
+
+def raise_for_error(response: dict):
+    """
+    Raise a JSON-RPC error returned in a response as `SolanaException`,
+    for clients that return errors rather than raising them.
+    """
+    if isinstance(response, dict) and response.get('error'):
+        exception = SolanaException(response['error'])
+        exception.data = response['error']
+        raise exception
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` requests per second, in bursts of up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: Optional[float]=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float=1):
+        """
+        Block until `tokens` are available, then take them.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Sender:
+    """
+    Send scheduler shared by `operations`.
+
+    - `rate`/`burst`: default token bucket for each endpoint (requests per second), `None` for no limit.
+    - `endpoint_rates`: per-endpoint `(rate, burst)` overrides, keyed by endpoint URL.
+    - `max_in_flight`: global cap on concurrent requests across all endpoints.
+    - `max_retries`, `base_delay`, `max_delay`: jittered exponential backoff between retries.
+    - `blockhash_ttl`: seconds to reuse a fetched blockhash for new transactions.
+    """
+    def __init__(
+            self,
+            rate: Optional[float]=None,
+            burst: Optional[float]=None,
+            endpoint_rates: Optional[Dict[str, Tuple[float, Optional[float]]]]=None,
+            max_in_flight: Optional[int]=None,
+            max_retries: int=5,
+            base_delay: float=0.25,
+            max_delay: float=10.0,
+            blockhash_ttl: float=20.0,
+            ):
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_rates = endpoint_rates or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.blockhash_ttl = blockhash_ttl
+        self.stats = Counter()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._blockhashes: Dict[str, Tuple[str, float]] = {}
+        self._sent: Dict[str, float] = {}  # Signatures of recently built transactions, oldest first
+        self._lock = threading.Lock()
+
+    def _bucket(self, endpoint: str) -> Optional[TokenBucket]:
+        try:
+            return self._buckets[endpoint]
+        except KeyError:
+            pass
+        with self._lock:
+            if endpoint not in self._buckets:
+                rate, burst = self.endpoint_rates.get(endpoint, (self.rate, self.burst))
+                self._buckets[endpoint] = TokenBucket(rate, burst) if rate else None
+            return self._buckets[endpoint]
+
+    def throttle(self, endpoint: str):
+        """
+        Block until a request to `endpoint` is within its rate limit.
+        """
+        bucket = self._bucket(endpoint)
+        if bucket is not None:
+            bucket.acquire()
+
+    def _call(self, client: Any, method: Callable, *args, **kwargs) -> Any:
+        # Clients spreading requests over several endpoints (`RpcRouter`) throttle each one themselves
+        if not getattr(client, 'throttles_endpoints', False):
+            self.throttle(endpoint_of(client))
+        if self._in_flight is None:
+            return method(*args, **kwargs)
+        with self._in_flight:
+            return method(*args, **kwargs)
+
+    def _backoff(self, attempt: int, exception: Exception):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        response = getattr(exception, 'response', None)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.max_delay, float(retry_after)))
+        time.sleep(delay)
+
+    def request(self, client: Any, method_name: str, *args, **kwargs) -> dict:
+        """
+        Rate-limited JSON-RPC read, e.g. `request(client, 'get_account_info', pubkey)`,
+        retried on transient failures.
+        """
+        method = getattr(client, method_name)
+        attempt = 0
+        while True:
+            try:
+                response = self._call(client, method, *args, **kwargs)
+                raise_for_error(response)
+                return response
+            except Exception as e:  # pylint: disable=broad-except
+                kind = classify(e)
+                if kind not in (ErrorKind.RETRY, ErrorKind.RATE_LIMITED) or attempt >= self.max_retries:
+                    raise
+                self.stats[kind.value] += 1
+                self._backoff(attempt, e)
+                attempt += 1
+
+    def recent_blockhash(self, client: Any, refresh: bool=False) -> str:
+        """
+        A recent blockhash for `client`'s endpoint, cached for `blockhash_ttl` seconds.
+        """
+        endpoint = endpoint_of(client)
+        cached = self._blockhashes.get(endpoint)
+        if not refresh and cached is not None and time.monotonic() - cached[1] < self.blockhash_ttl:
+            return cached[0]
+        response = self.request(client, 'get_recent_blockhash')
+        blockhash = response['result']['value']['blockhash']
+        self._blockhashes[endpoint] = (blockhash, time.monotonic())
+        return blockhash
+
+    def _build(self, client: Any, build: Callable[[str], bytes], refresh: bool=False) -> bytes:
+        # A transaction identical to one sent recently (same bytes under the same
+        # blockhash) would be dropped as already processed; wait for a new blockhash
+        blockhash = self.recent_blockhash(client, refresh)
+        while True:
+            raw_tx = build(blockhash)
+            signature = _signature(raw_tx)
+            now = time.monotonic()
+            with self._lock:
+                while self._sent:
+                    oldest = next(iter(self._sent))
+                    if now - self._sent[oldest] < _SIGNATURE_TTL:
+                        break
+                    del self._sent[oldest]
+                if signature not in self._sent:
+                    self._sent[signature] = now
+                    return raw_tx
+            self.stats['duplicate'] += 1
+            stale = blockhash
+            deadline = time.monotonic() + _BLOCKHASH_WAIT
+            blockhash = self.recent_blockhash(client, refresh=True)
+            while blockhash == stale:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"No new blockhash to resend duplicate transaction {signature}")
+                time.sleep(min(self.base_delay, 0.1))
+                blockhash = self.recent_blockhash(client, refresh=True)
+
+    def submit(self, client: Any, build: Callable[[str], bytes]) -> dict:
+        """
+        Send a transaction built and signed by `build(recent_blockhash)` as wire bytes.
+
+        `build` is called again with a fresh blockhash if the transaction expires,
+        or if it is identical to one sent recently.
+        """
+        raw_tx = self._build(client, build)
+        attempt = 0
+        attempted = False  # Whether an earlier attempt of `raw_tx` may have reached the cluster
+        while True:
+            try:
+                response = self._call(client, client.send_raw_transaction, raw_tx)
+                raise_for_error(response)
+                self.stats['sent'] += 1
+                return response
+            except Exception as e:  # pylint: disable=broad-except
+                kind = classify(e)
+                if kind is ErrorKind.PROCESSED and attempted:
+                    # An earlier attempt of this very transaction landed
+                    self.stats[kind.value] += 1
+                    return {'result': _signature(raw_tx)}
+                if kind is ErrorKind.FATAL or attempt >= self.max_retries:
+                    self.stats['failed'] += 1
+                    raise
+                self.stats[kind.value] += 1
+                if kind in (ErrorKind.EXPIRED, ErrorKind.PROCESSED):
+                    # Expired, or processed although we never sent it: another identical transaction landed
+                    raw_tx = self._build(client, build, refresh=True)
+                    attempted = False
+                else:
+                    self._backoff(attempt, e)
+                    attempted = True
+                attempt += 1
+
+    def send(self, client: Any, tx: Transaction, *signers: Account) -> dict:
+        """
+        Sign `tx` with `signers` (the first pays fees) and send it.
+        """
+        unique: Dict[bytes, Account] = {}
+        for signer in signers:
+            unique.setdefault(bytes(signer.public_key()), signer)
+        signers = tuple(unique.values())
+
+        def build(blockhash: str) -> bytes:
+            tx.recent_blockhash = blockhash
+            tx.sign(*signers)
+            return tx.serialize()
+        return self.submit(client, build)
+
+
+default_sender = Sender()
+"""
+Sender used by `operations` when none is passed: no rate limit, up to 5 retries.
+"""
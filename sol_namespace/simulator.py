@@ -0,0 +1,573 @@
+"""
+In-process simulator of SPL Name Service and the JSON-RPC methods this library uses.
+
+`SimulatedClient` is a drop-in replacement for `solana.rpc.api.Client` anywhere
+`operations` accepts a client, and `serve` exposes the same simulator over HTTP
+so that a real `Client` (or any other tool) can talk to it.
+
+Create/update/transfer/delete follow the on-chain program's owner, class and
+parent authority checks and failure logs. Transactions are atomic. Payer balances
+are not tracked; fees are only counted in `NameServiceSimulator.stats`.
+"""
+import json
+import random
+import struct
+import threading
+import time
+from base64 import b64decode, b64encode
+from collections import Counter
+from dataclasses import dataclass
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Union, Any, Dict, List, Set, Tuple
+
+import requests
+from base58 import b58decode, b58encode
+
+from solana.account import Account
+from solana.publickey import PublicKey
+from solana.rpc.exception import SolanaException
+from solana.transaction import Transaction
+
+from sol_namespace.name_model import NameProgram, default_program, NAME_HEADER_LEN
+
+
+LAMPORTS_PER_SIGNATURE = 5000
+RENT_PER_BYTE = 6960  # Two years of rent at 3480 lamports per byte-year
+ACCOUNT_STORAGE_OVERHEAD = 128
+BLOCKHASH_TTL = 150  # slots
+PACKET_DATA_SIZE = 1232  # Bytes per serialized transaction
+
+_DEFAULT_KEY = bytes(32)
+
+
+@dataclass
+class SimulatedAccount:
+    """
+    Account state held by the simulator.
+    """
+    lamports: int
+    data: bytes
+    owner: bytes
+
+
+class _InstructionError(Exception):
+    def __init__(self, error: Union[str, dict], logs: List[str]):
+        super().__init__(error)
+        self.error = error
+        self.logs = logs
+
+
+class _InjectedFailure(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def _rpc_error(code: int, message: str, data: Optional[dict]=None) -> dict:
+    error = {'code': code, 'message': message}
+    if data is not None:
+        error['data'] = data
+    return error
+
+
+def _simulation_failure(err: Union[str, dict], logs: List[str], reason: str) -> dict:
+    return _rpc_error(
+        -32002,
+        f"Transaction simulation failed: {reason}",
+        {'accounts': None, 'err': err, 'logs': logs})
+
+
+class NameServiceSimulator:
+    """
+    In-memory SPL Name Service program and JSON-RPC node.
+
+    - `latency`: seconds added to every request (plus up to `jitter` seconds).
+    - `failure_rate`: probability that a request fails at the HTTP layer with `failure_status`.
+    - `slot_time`: seconds per slot; blockhashes expire after `blockhash_ttl` slots.
+    - `verify_signatures`: verify ed25519 signatures of raw transactions.
+    """
+    def __init__(
+            self,
+            program: NameProgram=default_program,
+            latency: float=0.0,
+            jitter: float=0.0,
+            failure_rate: float=0.0,
+            failure_status: int=429,
+            slot_time: float=0.4,
+            blockhash_ttl: int=BLOCKHASH_TTL,
+            verify_signatures: bool=True,
+            seed: Optional[int]=None,
+            ):
+        self.program = program
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.slot_time = slot_time
+        self.blockhash_ttl = blockhash_ttl
+        self.verify_signatures = verify_signatures
+        self.accounts: Dict[bytes, SimulatedAccount] = {}
+        self.stats = Counter()
+        self._program_id = bytes(program.id)
+        self._random = random.Random(seed)
+        self._seed = str(seed).encode()
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._slot_offset = 0
+        self._blockhashes: Dict[str, int] = {}  # Slot each blockhash was issued in, oldest first
+        self._processed: Dict[str, Set[bytes]] = {}  # Signatures processed, by blockhash
+        self._pruned_slot = 0
+        self._addresses: Dict[Tuple[bytes, bytes, bytes], bytes] = {}
+
+    # Clock
+
+    @property
+    def slot(self) -> int:
+        return int((time.monotonic() - self._started) / self.slot_time) + self._slot_offset
+
+    def advance(self, slots: int):
+        """
+        Move the simulated clock forward, e.g. to expire outstanding blockhashes.
+        """
+        with self._lock:
+            self._slot_offset += slots
+
+    def recent_blockhash(self) -> str:
+        slot = self.slot
+        blockhash = b58encode(sha256(self._seed + slot.to_bytes(8, 'little')).digest()).decode()
+        with self._lock:
+            self._prune(slot)
+            self._blockhashes.setdefault(blockhash, slot)
+        return blockhash
+
+    def _prune(self, slot: int):
+        # Forget expired blockhashes, along with the signatures processed under them;
+        # transactions using them are rejected as expired anyway
+        if slot == self._pruned_slot:
+            return
+        self._pruned_slot = slot
+        while self._blockhashes:
+            oldest = next(iter(self._blockhashes))
+            if slot - self._blockhashes[oldest] <= self.blockhash_ttl:
+                break
+            del self._blockhashes[oldest]
+            self._processed.pop(oldest, None)
+
+    # JSON-RPC
+
+    def call(self, method: str, params: List[Any]) -> dict:
+        """
+        Handle one JSON-RPC request, returning its `result` or `error` object.
+        Injected HTTP-level failures are raised as `_InjectedFailure`.
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats[method] += 1
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.jitter * self._random.random())
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            with self._lock:
+                self.stats['injected_failures'] += 1
+            raise _InjectedFailure(self.failure_status)
+        handler = self._methods.get(method)
+        if handler is None:
+            return {'error': _rpc_error(-32601, "Method not found")}
+        try:
+            return handler(self, *params)
+        except (TypeError, ValueError, IndexError) as e:
+            return {'error': _rpc_error(-32602, f"Invalid params: {e}")}
+
+    def _context(self) -> dict:
+        return {'slot': self.slot}
+
+    def _encode_account(self, account: Optional[SimulatedAccount], encoding: str) -> Optional[dict]:
+        if account is None:
+            return None
+        if encoding == 'base58':
+            data = [b58encode(account.data).decode(), 'base58']
+        else:
+            data = [b64encode(account.data).decode(), 'base64']
+        return {
+            'data': data,
+            'executable': False,
+            'lamports': account.lamports,
+            'owner': b58encode(account.owner).decode(),
+            'rentEpoch': 0,
+        }
+
+    def _get_account_info(self, pubkey: str, config: Optional[dict]=None) -> dict:
+        encoding = (config or {}).get('encoding', 'base64')
+        account = self.accounts.get(b58decode(pubkey))
+        return {'result': {'context': self._context(), 'value': self._encode_account(account, encoding)}}
+
+    def _get_multiple_accounts(self, pubkeys: List[str], config: Optional[dict]=None) -> dict:
+        if len(pubkeys) > 100:
+            return {'error': _rpc_error(-32602, "Too many inputs provided; max 100")}
+        encoding = (config or {}).get('encoding', 'base64')
+        accounts = self.accounts
+        value = [self._encode_account(accounts.get(b58decode(key)), encoding) for key in pubkeys]
+        return {'result': {'context': self._context(), 'value': value}}
+
+    def _get_recent_blockhash(self, config: Optional[dict]=None) -> dict:
+        value = {
+            'blockhash': self.recent_blockhash(),
+            'feeCalculator': {'lamportsPerSignature': LAMPORTS_PER_SIGNATURE},
+        }
+        return {'result': {'context': self._context(), 'value': value}}
+
+    def _get_latest_blockhash(self, config: Optional[dict]=None) -> dict:
+        value = {
+            'blockhash': self.recent_blockhash(),
+            'lastValidBlockHeight': self.slot + self.blockhash_ttl,
+        }
+        return {'result': {'context': self._context(), 'value': value}}
+
+    def _get_minimum_balance_for_rent_exemption(self, size: int, config: Optional[dict]=None) -> dict:
+        return {'result': (ACCOUNT_STORAGE_OVERHEAD + size) * RENT_PER_BYTE}
+
+    def _get_slot(self, config: Optional[dict]=None) -> dict:
+        return {'result': self.slot}
+
+    def _get_health(self) -> dict:
+        return {'result': 'ok'}
+
+    def _send_transaction(self, wire: str, config: Optional[dict]=None) -> dict:
+        encoding = (config or {}).get('encoding', 'base58')
+        raw = b64decode(wire) if encoding == 'base64' else b58decode(wire)
+        if len(raw) > PACKET_DATA_SIZE:
+            return {'error': _rpc_error(-32602, f"transaction too large: {len(raw)} > {PACKET_DATA_SIZE}")}
+        try:
+            tx = Transaction.deserialize(raw)
+        except Exception as e:  # pylint: disable=broad-except
+            return {'error': _rpc_error(-32602, f"failed to deserialize transaction: {e}")}
+        if self.verify_signatures and not tx.verify_signatures():
+            return {'error': _rpc_error(-32003, "Transaction signature verification failure")}
+        return self.execute(tx)
+
+    _methods = {
+        'getAccountInfo': _get_account_info,
+        'getMultipleAccounts': _get_multiple_accounts,
+        'getRecentBlockhash': _get_recent_blockhash,
+        'getLatestBlockhash': _get_latest_blockhash,
+        'getMinimumBalanceForRentExemption': _get_minimum_balance_for_rent_exemption,
+        'getSlot': _get_slot,
+        'getHealth': _get_health,
+        'sendTransaction': _send_transaction,
+    }
+
+    # Transaction processing
+
+    def execute(self, tx: Transaction) -> dict:
+        """
+        Atomically execute a signed transaction, returning its JSON-RPC response.
+        """
+        signed = {bytes(pair.pubkey) for pair in tx.signatures if pair.signature}
+        if not signed:
+            return {'error': _rpc_error(-32003, "Transaction signature verification failure")}
+        for instr in tx.instructions:
+            for meta in instr.keys:
+                if meta.is_signer and bytes(meta.pubkey) not in signed:
+                    return {'error': _rpc_error(-32003, "Transaction signature verification failure")}
+        signature = tx.signatures[0].signature
+        blockhash = str(tx.recent_blockhash)
+        with self._lock:
+            self._prune(self.slot)
+            issued = self._blockhashes.get(blockhash)
+            if issued is None or self.slot - issued > self.blockhash_ttl:
+                self.stats['expired_transactions'] += 1
+                return {'error': _simulation_failure('BlockhashNotFound', [], "Blockhash not found")}
+            if signature in self._processed.get(blockhash, ()):
+                return {'error': _simulation_failure(
+                    'AlreadyProcessed', [], "This transaction has already been processed")}
+            pending: Dict[bytes, Optional[SimulatedAccount]] = {}
+            logs: List[str] = []
+            for index, instr in enumerate(tx.instructions):
+                try:
+                    self._execute_instruction(instr, signed, pending, logs)
+                except _InstructionError as e:
+                    self.stats['failed_transactions'] += 1
+                    return {'error': _simulation_failure(
+                        {'InstructionError': [index, e.error]},
+                        logs,
+                        f"Error processing Instruction {index}: {_describe(e.error)}")}
+            for key, account in pending.items():
+                if account is None:
+                    self.accounts.pop(key, None)
+                else:
+                    self.accounts[key] = account
+            self._processed.setdefault(blockhash, set()).add(signature)
+            self.stats['transactions'] += 1
+            self.stats['fees'] += LAMPORTS_PER_SIGNATURE * len(tx.signatures)
+        return {'result': b58encode(signature).decode()}
+
+    def _execute_instruction(self, instr, signed: Set[bytes], pending: dict, logs: List[str]):
+        program_id = bytes(instr.program_id)
+        program_name = str(instr.program_id)
+        logs.append(f"Program {program_name} invoke [1]")
+        if program_id != self._program_id:
+            logs.append(f"Program {program_name} failed: incorrect program id for instruction")
+            raise _InstructionError('IncorrectProgramId', logs)
+        data = instr.data
+        keys = [bytes(meta.pubkey) for meta in instr.keys]
+        signers = {key for meta, key in zip(instr.keys, keys) if meta.is_signer and key in signed}
+        try:
+            if not data:
+                raise _InstructionError('InvalidInstructionData', logs)
+            handler = self._instructions.get(data[0])
+            if handler is None:
+                raise _InstructionError('InvalidInstructionData', logs)
+            logs.append(f"Program log: Instruction: {handler.__name__[1:].capitalize()}")
+            handler(self, data, keys, signers, pending, logs)
+        except (struct.error, IndexError) as e:
+            raise _InstructionError('InvalidInstructionData', logs) from e
+        except _InstructionError as e:
+            logs.append(f"Program {program_name} failed: {_describe(e.error)}")
+            raise
+        logs.append(f"Program {program_name} success")
+
+    def _load(self, key: bytes, pending: dict) -> Optional[SimulatedAccount]:
+        if key in pending:
+            return pending[key]
+        return self.accounts.get(key)
+
+    def _derive(self, hashed_name: bytes, class_key: bytes, parent_key: bytes) -> bytes:
+        seeds = (hashed_name, class_key, parent_key)
+        address = self._addresses.get(seeds)
+        if address is None:
+            address = bytes(PublicKey.find_program_address(list(seeds), self.program.id)[0])
+            self._addresses[seeds] = address
+        return address
+
+    @staticmethod
+    def _fail(logs: List[str], message: str, error: str='InvalidArgument'):
+        logs.append(f"Program log: {message}")
+        raise _InstructionError(error, logs)
+
+    def _create(self, data: bytes, keys: List[bytes], signers: Set[bytes], pending: dict, logs: List[str]):
+        name_len, = struct.unpack_from('<I', data, 1)
+        hashed_name = data[5:5 + name_len]
+        lamports, space = struct.unpack_from('<QI', data, 5 + name_len)
+        payer, name_key, owner, class_key, parent_key = keys[1:6]
+        if payer not in signers:
+            raise _InstructionError('MissingRequiredSignature', logs)
+        if name_key != self._derive(hashed_name, class_key, parent_key):
+            self._fail(logs, "The given name account is incorrect.")
+        if self._load(name_key, pending) is not None:
+            self._fail(logs, "The given name account already exists.")
+        if class_key != _DEFAULT_KEY and class_key not in signers:
+            self._fail(logs, "The given name class is not a signer.")
+        if parent_key != _DEFAULT_KEY:
+            parent_owner = keys[6] if len(keys) > 6 else None
+            if parent_owner not in signers:
+                self._fail(logs, "The given parent name account owner is not a signer.")
+            parent = self._load(parent_key, pending)
+            if parent is None or parent.owner != self._program_id:
+                raise _InstructionError('InvalidAccountData', logs)
+            if parent.data[32:64] != parent_owner:
+                self._fail(logs, "The given parent name account owner is not correct.")
+        if owner == _DEFAULT_KEY:
+            self._fail(logs, "The owner cannot be `Pubkey::default()`.")
+        header = parent_key + owner + class_key
+        pending[name_key] = SimulatedAccount(lamports, header + bytes(space), self._program_id)
+
+    def _update(self, data: bytes, keys: List[bytes], signers: Set[bytes], pending: dict, logs: List[str]):
+        offset, length = struct.unpack_from('<II', data, 1)
+        input_data = data[9:9 + length]
+        name_key, signer = keys[0], keys[1]
+        account = self._load(name_key, pending)
+        if account is None or account.owner != self._program_id:
+            raise _InstructionError('InvalidAccountData', logs)
+        header_owner, header_class = account.data[32:64], account.data[64:96]
+        if header_class != _DEFAULT_KEY:
+            if signer != header_class or signer not in signers:
+                self._fail(logs, "The given name class account is incorrect or not a signer.")
+        elif signer != header_owner or signer not in signers:
+            self._fail(logs, "The given name owner account is incorrect or not a signer.")
+        start = NAME_HEADER_LEN + offset
+        if start + len(input_data) > len(account.data):
+            self._fail(logs, "The given data is out of bounds.")
+        updated = account.data[:start] + input_data + account.data[start + len(input_data):]
+        pending[name_key] = SimulatedAccount(account.lamports, updated, account.owner)
+
+    def _transfer(self, data: bytes, keys: List[bytes], signers: Set[bytes], pending: dict, logs: List[str]):
+        new_owner = data[1:33]
+        if len(new_owner) != 32:
+            raise _InstructionError('InvalidInstructionData', logs)
+        name_key, owner = keys[0], keys[1]
+        account = self._load(name_key, pending)
+        if account is None or account.owner != self._program_id:
+            raise _InstructionError('InvalidAccountData', logs)
+        if owner != account.data[32:64] or owner not in signers:
+            self._fail(logs, "The given name owner is incorrect or not a signer.")
+        header_class = account.data[64:96]
+        if header_class != _DEFAULT_KEY:
+            class_key = keys[2] if len(keys) > 2 else None
+            if class_key != header_class or class_key not in signers:
+                self._fail(logs, "The given name class account is incorrect or not a signer.")
+        updated = account.data[:32] + new_owner + account.data[64:]
+        pending[name_key] = SimulatedAccount(account.lamports, updated, account.owner)
+
+    def _delete(self, data: bytes, keys: List[bytes], signers: Set[bytes], pending: dict, logs: List[str]):
+        name_key, owner, refund = keys[0], keys[1], keys[2]
+        account = self._load(name_key, pending)
+        if account is None or account.owner != self._program_id:
+            raise _InstructionError('InvalidAccountData', logs)
+        if owner != account.data[32:64] or owner not in signers:
+            self._fail(logs, "The given name owner is incorrect or not a signer.")
+        pending[name_key] = None
+        refund_account = self._load(refund, pending)
+        if refund_account is not None:
+            pending[refund] = SimulatedAccount(
+                refund_account.lamports + account.lamports,
+                refund_account.data,
+                refund_account.owner)
+
+    _instructions = {0: _create, 1: _update, 2: _transfer, 3: _delete}
+
+
+def _describe(error: Union[str, dict]) -> str:
+    if isinstance(error, dict):
+        return str(error)
+    # e.g. InvalidArgument -> invalid argument
+    return ''.join(' ' + c.lower() if c.isupper() else c for c in error).strip()
+
+
+class SimulatedClient:
+    """
+    Stand-in for `solana.rpc.api.Client` backed by a `NameServiceSimulator`.
+
+    Failed sends raise `SolanaException` carrying the JSON-RPC error object,
+    and injected failures raise `requests.HTTPError`, as with a real endpoint.
+    """
+    def __init__(self, simulator: Optional[NameServiceSimulator]=None, endpoint_uri: str="sim://name-service"):
+        self.simulator = simulator or NameServiceSimulator()
+        self.endpoint_uri = endpoint_uri
+
+    def _request(self, method: str, *params: Any) -> dict:
+        try:
+            response = self.simulator.call(method, list(params))
+        except _InjectedFailure as e:
+            failure = requests.Response()
+            failure.status_code = e.status
+            failure.url = self.endpoint_uri
+            raise requests.HTTPError(f"{e.status} Error for url: {self.endpoint_uri}", response=failure) from e
+        response['jsonrpc'] = '2.0'
+        return response
+
+    def _send(self, method: str, *params: Any) -> dict:
+        response = self._request(method, *params)
+        if 'error' in response:
+            exception = SolanaException(response['error'])
+            exception.data = response['error']
+            raise exception
+        return response
+
+    def get_account_info(self, pubkey: Union[PublicKey, str], commitment=None, encoding: str='base64', data_slice=None) -> dict:
+        return self._request('getAccountInfo', str(pubkey), {'encoding': encoding})
+
+    def get_multiple_accounts(self, pubkeys: List[Union[PublicKey, str]], commitment=None, encoding: str='base64', data_slice=None) -> dict:
+        return self._request('getMultipleAccounts', [str(key) for key in pubkeys], {'encoding': encoding})
+
+    def get_recent_blockhash(self, commitment=None) -> dict:
+        return self._request('getRecentBlockhash')
+
+    def get_minimum_balance_for_rent_exemption(self, usize: int, commitment=None) -> dict:
+        return self._request('getMinimumBalanceForRentExemption', usize)
+
+    def get_slot(self, commitment=None) -> dict:
+        return self._request('getSlot')
+
+    def send_raw_transaction(self, txn: Union[bytes, str], opts=None) -> dict:
+        if isinstance(txn, bytes):
+            txn = b64encode(txn).decode()
+        return self._send('sendTransaction', txn, {'encoding': 'base64'})
+
+    def send_transaction(self, txn: Transaction, *signers: Account, opts=None) -> dict:
+        txn.recent_blockhash = self.get_recent_blockhash()['result']['value']['blockhash']
+        txn.sign(*signers)
+        txn.serialize()  # Enforces the transaction size limit, as `Client` does
+        # Signed locally just now, so skip the wire round trip and signature check
+        self._request('getHealth')  # Still pay the request's latency and failure odds
+        response = self.simulator.execute(txn)
+        if 'error' in response:
+            exception = SolanaException(response['error'])
+            exception.data = response['error']
+            raise exception
+        response['jsonrpc'] = '2.0'
+        return response
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: 'SimulatorServer'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path.rstrip('/') == '/health':
+            self._reply(200, b'ok', 'text/plain')
+        else:
+            self._reply(404, b'', 'text/plain')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            request = json.loads(body)
+        except ValueError:
+            reply = {'jsonrpc': '2.0', 'id': None, 'error': _rpc_error(-32700, "Parse error")}
+            self._reply(200, json.dumps(reply).encode())
+            return
+        batch = isinstance(request, list)
+        replies = []
+        for item in request if batch else [request]:
+            try:
+                reply = self.server.simulator.call(item.get('method'), item.get('params') or [])
+            except _InjectedFailure as e:
+                self._reply(e.status, b'', 'text/plain')
+                return
+            reply['jsonrpc'] = '2.0'
+            reply['id'] = item.get('id')
+            replies.append(reply)
+        self._reply(200, json.dumps(replies if batch else replies[0]).encode())
+
+    def _reply(self, status: int, body: bytes, content_type: str='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    """
+    JSON-RPC over HTTP front end for a `NameServiceSimulator`.
+    """
+    daemon_threads = True
+
+    def __init__(self, simulator: NameServiceSimulator, host: str='127.0.0.1', port: int=8899):
+        super().__init__((host, port), _RequestHandler)
+        self.simulator = simulator
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve(
+        simulator: Optional[NameServiceSimulator]=None,
+        host: str='127.0.0.1',
+        port: int=8899,
+        background: bool=True,
+        ) -> SimulatorServer:
+    """
+    Serve a simulator over HTTP, by default from a daemon thread.
+    Pass `port=0` to pick a free port; the chosen one is in `server.url`.
+    """
+    server = SimulatorServer(simulator or NameServiceSimulator(), host, port)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
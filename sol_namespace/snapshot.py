@@ -0,0 +1,251 @@
+"""
+Compact binary snapshots of whole namespace trees.
+
+`save_tree` writes every node's derived values (hashed name, account, bump) along
+with its owner, class, parent, space, balance and serialized data. `load_tree`
+memory-maps the file and builds `NamespaceNode`s only as they are accessed,
+without any hashing or address derivation.
+
+Layout (little-endian, version 1):
+  - Header: magic, version, program ID, hash prefix length, node count,
+    key count and the offsets of the following sections, then the hash prefix.
+  - Key table: deduplicated 32-byte owner and class accounts.
+  - Node records: one fixed-size record per node, parents before children.
+  - Blobs: name fields (UTF-8) and serialized data, referenced by offset.
+"""
+from __future__ import annotations
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from typing import Optional, Dict, Iterable, Iterator, List
+
+from solana.publickey import PublicKey
+
+from sol_namespace.name_model import NameProgram, NamespaceData, NamespaceNode, default_program
+
+
+MAGIC = b'SOLNSTRE'
+VERSION = 1
+
+# magic, version, reserved, program ID, prefix length, node count, key count,
+# key table offset, records offset, blobs offset
+_HEADER = struct.Struct('<8sHH32sIIIQQQ')
+# hashed name, account, bump, owner key index, class key index, parent index (-1 for none),
+# space, balance (-1 for none), field offset, field length, data offset, data length
+_RECORD = struct.Struct('<32s32sBIIiIqQIQI')
+
+
+class SnapshotError(ValueError):
+    """
+    Raised on files that are not namespace snapshots, or of an unsupported version.
+    """
+
+
+@dataclass
+class StoredData(NamespaceData):
+    """
+    Namespace data restored from a snapshot, held in its serialized form.
+    """
+    def serialize(self) -> bytes:
+        return bytes(self.data)
+
+
+def save_tree(nodes: Iterable[NamespaceNode], path: str):
+    """
+    Write nodes to a snapshot file. Nodes must share one program, and every
+    node's parent (if any) must come before it.
+    """
+    nodes = list(nodes)
+    if not nodes:
+        raise ValueError("No nodes to save")
+    program = nodes[0].program
+    prefix = program.hash_prefix.encode()
+    key_index: Dict[bytes, int] = {}
+    keys: List[bytes] = []
+    node_index: Dict[bytes, int] = {}
+    records = bytearray()
+    blobs = bytearray()
+
+    def key(pubkey: PublicKey) -> int:
+        raw = bytes(pubkey)
+        index = key_index.get(raw)
+        if index is None:
+            index = key_index[raw] = len(keys)
+            keys.append(raw)
+        return index
+
+    for i, node in enumerate(nodes):
+        if node.program != program:
+            raise ValueError(f"Node {node.account} is under a different program")
+        if bytes(node.account) in node_index:
+            raise ValueError(f"Node {node.account} is listed more than once")
+        node_index[bytes(node.account)] = i
+        if node.parent is None:
+            parent = -1
+        elif bytes(node.parent.account) in node_index:
+            parent = node_index[bytes(node.parent.account)]
+        else:
+            raise ValueError(f"Parent of node {node.account} must be saved before it")
+        field = node.data.field.encode()
+        data = node.data.serialize()
+        records += _RECORD.pack(
+            node.hashed_name_field,
+            bytes(node.account),
+            node.bump,
+            key(node.owner_account),
+            key(node.class_account),
+            parent,
+            node.data.space,
+            -1 if node.balance is None else node.balance,
+            len(blobs),
+            len(field),
+            len(blobs) + len(field),
+            len(data),
+            )
+        blobs += field
+        blobs += data
+
+    keys_offset = _HEADER.size + len(prefix)
+    records_offset = keys_offset + 32 * len(keys)
+    blobs_offset = records_offset + len(records)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(
+            MAGIC, VERSION, 0, bytes(program.id), len(prefix), len(node_index), len(keys),
+            keys_offset, records_offset, blobs_offset))
+        f.write(prefix)
+        f.write(b''.join(keys))
+        f.write(records)
+        f.write(blobs)
+
+
+class Snapshot:
+    """
+    A memory-mapped namespace tree snapshot. Nodes are built on first access,
+    by index in the order they were saved; index 0 is the first node saved.
+    """
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise SnapshotError(f"{path} is not a namespace snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header(path)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _read_header(self, path: str):
+        (magic, version, _, program_id, prefix_len, self._count, key_count,
+         self._keys_offset, self._records_offset, self._blobs_offset) = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a namespace snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+        if self._keys_offset != _HEADER.size + prefix_len \
+                or self._records_offset != self._keys_offset + 32 * key_count \
+                or self._blobs_offset != self._records_offset + _RECORD.size * self._count \
+                or self._blobs_offset > len(self._mmap) or self._count == 0:
+            raise SnapshotError(f"{path} is truncated or corrupt")
+        try:
+            prefix = self._mmap[_HEADER.size:self._keys_offset].decode()
+        except UnicodeDecodeError as e:
+            raise SnapshotError(f"{path} is truncated or corrupt") from e
+        if prefix == default_program.hash_prefix and program_id == bytes(default_program.id):
+            self.program = default_program
+        else:
+            self.program = NameProgram(hash_prefix=prefix, id=PublicKey(program_id))
+        self._keys: List[Optional[PublicKey]] = [None] * key_count
+        self._nodes: List[Optional[NamespaceNode]] = [None] * self._count
+        self._accounts: Optional[Dict[bytes, int]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> NamespaceNode:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        node = self._nodes[index]
+        if node is None:
+            # Build any missing ancestors first, root-most first
+            missing = [index]
+            parent = self._record(index)[5]
+            while parent >= 0 and self._nodes[parent] is None:
+                missing.append(parent)
+                parent = self._record(parent)[5]
+            for i in reversed(missing):
+                self._nodes[i] = self._build(i)
+            node = self._nodes[index]
+        return node
+
+    def __iter__(self) -> Iterator[NamespaceNode]:
+        for i in range(self._count):
+            yield self[i]
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def root(self) -> NamespaceNode:
+        return self[0]
+
+    def find(self, account: PublicKey) -> Optional[NamespaceNode]:
+        """
+        Look up a node by its account address. The first lookup indexes all accounts.
+        """
+        if self._accounts is None:
+            records, size = self._records_offset, _RECORD.size
+            self._accounts = {
+                self._mmap[records + i * size + 32:records + i * size + 64]: i
+                for i in range(self._count)
+            }
+        index = self._accounts.get(bytes(account))
+        return None if index is None else self[index]
+
+    def close(self):
+        self._mmap.close()
+
+    def _record(self, index: int) -> tuple:
+        record = _RECORD.unpack_from(self._mmap, self._records_offset + index * _RECORD.size)
+        parent, field_end, data_end = record[5], record[8] + record[9], record[10] + record[11]
+        if not -1 <= parent < index or record[3] >= len(self._keys) or record[4] >= len(self._keys) \
+                or self._blobs_offset + max(field_end, data_end) > len(self._mmap):
+            raise SnapshotError(f"Snapshot record {index} is corrupt")
+        return record
+
+    def _key(self, index: int) -> PublicKey:
+        key = self._keys[index]
+        if key is None:
+            start = self._keys_offset + 32 * index
+            key = self._keys[index] = PublicKey(self._mmap[start:start + 32])
+        return key
+
+    def _build(self, index: int) -> NamespaceNode:
+        (hashed_name, account, bump, owner, class_account, parent, space, balance,
+         field_offset, field_len, data_offset, data_len) = self._record(index)
+        blobs = self._blobs_offset
+        field = self._mmap[blobs + field_offset:blobs + field_offset + field_len].decode()
+        data = self._mmap[blobs + data_offset:blobs + data_offset + data_len]
+        return NamespaceNode.restore(
+            owner_account=self._key(owner),
+            data=StoredData(field=field, space=space, data=data),
+            hashed_name_field=hashed_name,
+            account=PublicKey(account),
+            bump=bump,
+            parent=self._nodes[parent] if parent >= 0 else None,
+            class_account=self._key(class_account),
+            program=self.program,
+            balance=None if balance < 0 else balance,
+            )
+
+
+def load_tree(path: str) -> Snapshot:
+    """
+    Open a snapshot written by `save_tree`.
+    """
+    return Snapshot(path)
@@ -0,0 +1,358 @@
+"""
+Reconcile on-chain names with a desired namespace tree.
+
+`plan_sync` compares the desired nodes against their accounts on chain and
+produces a minimal, ordered `Plan` of deletes, creates, transfers and updates
+(only the changed byte ranges). `apply_plan` executes it, packing several
+instructions into each transaction and sending transactions concurrently.
+
+`apply_plan` returns a `SyncState` fingerprinting what the chain holds after the
+steps that succeeded. Passing it to the next `plan_sync` skips every node whose
+desired state has not changed since, so repeated syncs only touch what changed.
+"""
+from __future__ import annotations
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from hashlib import sha256
+from typing import Optional, Any, Dict, Iterable, List, Set, Tuple
+
+from solana.account import Account
+from solana.publickey import PublicKey
+from solana.rpc.api import Client
+from solana.transaction import Transaction, TransactionInstruction
+
+from spl.name_service import name_program
+
+from sol_namespace.name_model import NamespaceNode, NAME_HEADER_LEN
+from sol_namespace.sender import Sender, default_sender
+from sol_namespace import bulk
+from sol_namespace import instruction
+
+
+DELETE = 'delete'
+CREATE = 'create'
+TRANSFER = 'transfer'
+UPDATE = 'update'
+
+MAX_TX_SIZE = 1232  # Bytes per serialized transaction
+MAX_GAP = 16  # Merge changed ranges closer than this; a separate update instruction costs about as much
+# Bytes written per update instruction; a create with the most signers and keys plus one chunk still fits a transaction
+MAX_CHUNK = 480
+
+SyncState = Dict[bytes, bytes]
+"""
+Fingerprints of each node's owner, class, space and data, keyed by account.
+"""
+
+
+@dataclass
+class Step:
+    """
+    One change to apply to one name account.
+    """
+    kind: str  # One of DELETE, CREATE, TRANSFER, UPDATE
+    node: NamespaceNode
+    offset: int = 0  # UPDATE: where `data` goes
+    data: bytes = b''  # CREATE, UPDATE: bytes to write
+    owner: Optional[PublicKey] = None  # DELETE, TRANSFER: current owner on chain
+
+
+@dataclass
+class Plan:
+    """
+    Ordered steps to bring the chain in line with a desired tree.
+    """
+    steps: List[Step] = field(default_factory=list)
+    previous: SyncState = field(default_factory=dict)  # The state the plan was made against
+    fingerprints: SyncState = field(default_factory=dict)  # Of the desired nodes, once applied
+    removed: List[bytes] = field(default_factory=list)  # Accounts of nodes to remove
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for step in self.steps:
+            counts[step.kind] = counts.get(step.kind, 0) + 1
+        return counts
+
+
+@dataclass
+class StepResult:
+    """
+    Outcome of one plan step.
+    """
+    step: Step
+    ok: bool
+    result: Optional[Any] = None  # Transaction ID
+    error: Optional[str] = None
+
+
+@dataclass
+class SyncResult:
+    """
+    Outcome of applying a plan.
+    """
+    results: List[StepResult]
+    state: SyncState  # For the next `plan_sync`
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+
+def fingerprint(node: NamespaceNode) -> bytes:
+    """
+    Digest of everything about `node` that a sync reconciles.
+    """
+    hasher = sha256(bytes(node.owner_account))
+    hasher.update(bytes(node.class_account))
+    hasher.update(struct.pack('<I', node.data.space))
+    hasher.update(node.data.serialize())
+    return hasher.digest()[:16]
+
+
+def changed_ranges(
+        old: bytes,
+        new: bytes,
+        max_gap: int=MAX_GAP,
+        max_len: int=MAX_CHUNK,
+        ) -> List[Tuple[int, int]]:
+    """
+    `(start, end)` ranges where `new` differs from `old` (of at least the same length),
+    merging ranges separated by at most `max_gap` equal bytes into ranges of at most
+    `max_len` bytes.
+    """
+    ranges: List[Tuple[int, int]] = []
+    chunk = 64
+    for base in range(0, len(new), chunk):
+        a, b = old[base:base + chunk], new[base:base + chunk]
+        if a == b:
+            continue
+        start = next(i for i in range(len(b)) if a[i] != b[i])
+        end = next(i for i in range(len(b), 0, -1) if a[i - 1] != b[i - 1])
+        start, end = base + start, base + end
+        if ranges and start - ranges[-1][1] <= max_gap and end - ranges[-1][0] <= max_len:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.extend((i, min(i + max_len, end)) for i in range(start, end, max_len))
+    return ranges
+
+
+def _chunks(data: bytes, max_len: int=MAX_CHUNK) -> List[Tuple[int, bytes]]:
+    return [(i, data[i:i + max_len]) for i in range(0, len(data), max_len)]
+
+
+def plan_sync(
+        desired: Iterable[NamespaceNode],
+        client: Client,
+        state: Optional[SyncState]=None,
+        remove: Iterable[NamespaceNode]=(),
+        sender: Optional[Sender]=None,
+        max_gap: int=MAX_GAP,
+        ) -> Plan:
+    """
+    Plan the changes that make the chain match `desired`, nodes with parents before children.
+
+    - `state`: the `SyncResult.state` of a previous sync; nodes unchanged since are not checked.
+    - `remove`: nodes to delete if they still exist.
+
+    Names whose space changed are deleted and recreated. Data is written in
+    chunks of at most `MAX_CHUNK` bytes, so every step fits in a transaction.
+    """
+    nodes = list(desired)
+    remove = list(remove)
+    state = state or {}
+    plan = Plan()
+    fingerprints = [fingerprint(node) for node in nodes]
+    to_check = [
+        i for i, (node, digest) in enumerate(zip(nodes, fingerprints))
+        if state.get(bytes(node.account)) != digest
+    ]
+    on_chain = bulk.fetch_accounts(
+        client, [nodes[i].account for i in to_check] + [node.account for node in remove], sender)
+
+    deletes, creates, transfers, updates = [], [], [], []
+    for i, account_data in zip(to_check, on_chain):
+        node = nodes[i]
+        if account_data is not None and len(account_data) - NAME_HEADER_LEN != node.data.space:
+            deletes.append(Step(DELETE, node, owner=PublicKey(account_data[32:64])))
+            account_data = None
+        if account_data is None:
+            # New accounts are zero-filled; write the data in chunks, the first with the create
+            chunks = _chunks(node.data.serialize().rstrip(b'\0')) or [(0, b'')]
+            creates.append(Step(CREATE, node, data=chunks[0][1]))
+            updates.extend(Step(UPDATE, node, offset=offset, data=data) for offset, data in chunks[1:])
+            continue
+        owner = account_data[32:64]
+        if owner != bytes(node.owner_account):
+            transfers.append(Step(TRANSFER, node, owner=PublicKey(owner)))
+        # Compare and write the whole space, so data that shrank leaves no stale bytes behind
+        serialized = node.data.serialize().ljust(node.data.space, b'\0')
+        for start, end in changed_ranges(account_data[NAME_HEADER_LEN:], serialized, max_gap):
+            updates.append(Step(UPDATE, node, offset=start, data=serialized[start:end]))
+
+    removals = [
+        Step(DELETE, node, owner=PublicKey(account_data[32:64]))
+        for node, account_data in zip(remove, on_chain[len(to_check):])
+        if account_data is not None
+    ]
+    removals.sort(key=lambda step: -bulk.depth(step.node))
+    creates.sort(key=lambda step: bulk.depth(step.node))
+    # Transfers go first, so that new children of a transferred parent are signed by its new owner
+    plan.steps = removals + deletes + transfers + creates + updates
+
+    plan.previous = dict(state)
+    plan.fingerprints = {bytes(node.account): digest for node, digest in zip(nodes, fingerprints)}
+    plan.removed = [bytes(node.account) for node in remove]
+    return plan
+
+
+def _instructions(step: Step, funder: PublicKey) -> List[TransactionInstruction]:
+    node = step.node
+    if step.kind == CREATE:
+        instructions = [instruction.create_instruction(node, non_owner_funder=funder)]
+        if step.data:
+            instructions.append(instruction.update_instruction(node, input_data=step.data))
+        return instructions
+    if step.kind == UPDATE:
+        return [instruction.update_instruction(node, offset=step.offset, input_data=step.data)]
+    if step.kind == TRANSFER:
+        return [name_program.transfer_name(name_program.TransferNameParams(
+            name_account=node.account,
+            new_owner_account=node.owner_account,
+            owner_account=step.owner,
+            class_account=node.class_account,
+            name_program_id=node.program.id,
+            ))]
+    return [name_program.delete_name(name_program.DeleteNameParams(
+        name_account=node.account,
+        owner_account=step.owner,
+        refund_account=step.owner,
+        name_program_id=node.program.id,
+        ))]
+
+
+def _tx_size(instruction_bytes: int, keys: Set[bytes], signers: Set[bytes]) -> int:
+    # Signatures, message header, account keys, blockhash and instruction count
+    return 1 + 64 * len(signers) + 3 + 1 + 32 * len(keys) + 32 + 1 + instruction_bytes
+
+
+@dataclass
+class _Batch:
+    steps: List[Step] = field(default_factory=list)
+    instructions: List[TransactionInstruction] = field(default_factory=list)
+    keys: Set[bytes] = field(default_factory=set)
+    signers: Set[bytes] = field(default_factory=set)
+    instruction_bytes: int = 0
+
+    def fits(self, instructions: List[TransactionInstruction]) -> bool:
+        keys, signers, instruction_bytes = set(self.keys), set(self.signers), self.instruction_bytes
+        for instr in instructions:
+            keys.add(bytes(instr.program_id))
+            for meta in instr.keys:
+                keys.add(bytes(meta.pubkey))
+                if meta.is_signer:
+                    signers.add(bytes(meta.pubkey))
+            # Program index, account indices and data, with their compact-u16 lengths
+            instruction_bytes += 1 + 3 + len(instr.keys) + 3 + len(instr.data)
+        return _tx_size(instruction_bytes, keys, signers) <= MAX_TX_SIZE
+
+    def add(self, step: Step, instructions: List[TransactionInstruction]):
+        self.steps.append(step)
+        for instr in instructions:
+            self.instructions.append(instr)
+            self.keys.add(bytes(instr.program_id))
+            for meta in instr.keys:
+                self.keys.add(bytes(meta.pubkey))
+                if meta.is_signer:
+                    self.signers.add(bytes(meta.pubkey))
+            self.instruction_bytes += 1 + 3 + len(instr.keys) + 3 + len(instr.data)
+
+
+def _pack(steps: List[Step], funder: PublicKey) -> List[_Batch]:
+    batches: List[_Batch] = []
+    batch = _Batch(keys={bytes(funder)}, signers={bytes(funder)})
+    for step in steps:
+        instructions = _instructions(step, funder)
+        if batch.steps and not batch.fits(instructions):
+            batches.append(batch)
+            batch = _Batch(keys={bytes(funder)}, signers={bytes(funder)})
+        batch.add(step, instructions)
+    if batch.steps:
+        batches.append(batch)
+    return batches
+
+
+def apply_plan(
+        client: Client,
+        plan: Plan,
+        funder: Account,
+        *signers: Account,
+        sender: Optional[Sender]=None,
+        max_workers: int=8,
+        ) -> SyncResult:
+    """
+    Execute a plan. `funder` pays for new accounts and all fees; `signers` must
+    include every other owner, class and parent owner account involved.
+
+    Steps are packed into as few transactions as fit, and each phase (deletes,
+    transfers, creates level by level, updates) is sent concurrently. Steps on
+    accounts with a failed earlier step, and creates under a parent that was not
+    created, are not attempted. The returned state covers the desired nodes
+    whose steps all succeeded (or that needed none), so the next sync rechecks
+    the rest.
+    """
+    sender = sender or default_sender
+    keyring = {bytes(account.public_key()): account for account in (funder,) + signers}
+    funder_key = funder.public_key()
+
+    def send(batch: _Batch) -> List[StepResult]:
+        missing = [key for key in batch.signers if key not in keyring]
+        if missing:
+            error = f"missing signer {PublicKey(missing[0])}"
+            return [StepResult(step, False, error=error) for step in batch.steps]
+        tx = Transaction()
+        tx.add(*batch.instructions)
+        others = [keyring[key] for key in batch.signers if key != bytes(funder_key)]
+        try:
+            txid = sender.send(client, tx, funder, *others)['result']
+        except Exception as e:  # pylint: disable=broad-except
+            return [StepResult(step, False, error=str(e)) for step in batch.steps]
+        return [StepResult(step, True, txid) for step in batch.steps]
+
+    phases: List[List[Step]] = []
+    for kind in (DELETE, TRANSFER, CREATE, UPDATE):
+        steps = [step for step in plan.steps if step.kind == kind]
+        if kind == CREATE:
+            levels: Dict[int, List[Step]] = {}
+            for step in steps:
+                levels.setdefault(bulk.depth(step.node), []).append(step)
+            phases.extend(levels[level] for level in sorted(levels))
+        elif steps:
+            phases.append(steps)
+
+    results: List[StepResult] = []
+    failed: Set[bytes] = set()
+    with ThreadPoolExecutor(max_workers) as pool:
+        for steps in phases:
+            ready = []
+            for step in steps:
+                if bytes(step.node.account) in failed:
+                    results.append(StepResult(step, False, error="an earlier step on this name failed"))
+                elif step.kind == CREATE and step.node.parent is not None \
+                        and bytes(step.node.parent.account) in failed:
+                    results.append(StepResult(step, False, error="parent was not created"))
+                    failed.add(bytes(step.node.account))
+                else:
+                    ready.append(step)
+            for batch_results in pool.map(send, _pack(ready, funder_key)):
+                results.extend(batch_results)
+                failed.update(bytes(result.step.node.account) for result in batch_results if not result.ok)
+    state = dict(plan.previous)
+    for account in plan.removed:
+        state.pop(account, None)
+    for account, digest in plan.fingerprints.items():
+        if account in failed:
+            state.pop(account, None)
+        else:
+            state[account] = digest
+    return SyncResult(results, state)
@@ -0,0 +1,3 @@
+"""
+Offline tests, run against the in-process Name Service simulator.
+"""
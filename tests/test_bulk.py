@@ -0,0 +1,81 @@
+import unittest
+
+import requests
+from solana.account import Account
+from solana.rpc.api import Client
+
+from sol_namespace import bulk
+from sol_namespace import operations
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.sender import Sender
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient, serve
+from sol_namespace.sync import plan_sync
+
+
+class FlakyClient(SimulatedClient):
+    """
+    Fails every send for the first `failures` transactions.
+    """
+    failures = 0
+
+    def send_raw_transaction(self, txn, opts=None):
+        if self.failures:
+            self.failures -= 1
+            response = requests.Response()
+            response.status_code = 503
+            raise requests.HTTPError("503 Service Unavailable", response=response)
+        return super().send_raw_transaction(txn, opts)
+
+
+class BulkTest(unittest.TestCase):
+    def setUp(self):
+        self.client = FlakyClient(NameServiceSimulator(seed=0))
+        self.sender = Sender(max_retries=0)
+        self.owner = Account(bytes(range(32)))
+        self.root = NamespaceNode(
+            owner_account=self.owner.public_key(), data=NamespaceData(field="bulk root", space=0))
+        self.children = [
+            self.root.create_child(NamespaceData(field=f"child {i}", space=16, data=f"value {i}"))
+            for i in range(5)
+        ]
+        self.nodes = [self.root] + self.children
+
+    def create_many(self, **kwargs):
+        return bulk.create_many(self.client, self.nodes, self.owner, sender=self.sender, **kwargs)
+
+    def test_create_is_idempotent(self):
+        self.assertEqual({r.action for r in self.create_many()}, {bulk.CREATED})
+        self.assertEqual({r.action for r in self.create_many()}, {bulk.SKIPPED})
+
+    def test_update_shrinking_data(self):
+        self.create_many()
+        self.children[0].data.data = "v"
+        results = self.create_many(existing='update')
+        self.assertEqual([r.action for r in results].count(bulk.UPDATED), 1)
+        self.assertEqual(operations.get_name_data(self.client, self.children[0]), b"v".ljust(16, b"\0"))
+        self.assertEqual({r.action for r in self.create_many(existing='update')}, {bulk.SKIPPED})
+
+    def test_transport_failures_are_reported_per_node(self):
+        self.client.failures = 1  # The root's create
+        results = self.create_many()
+        self.assertEqual([r.action for r in results], [bulk.FAILED] * len(self.nodes))
+        self.assertIn("503", results[0].error)
+        self.assertEqual(results[1].error, "parent was not created")
+
+
+class HttpClientTest(unittest.TestCase):
+    def test_create_many_with_solana_client(self):
+        server = serve(NameServiceSimulator(seed=0), port=0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        client = Client(server.url)
+        owner = Account(bytes(range(32)))
+        root = NamespaceNode(owner_account=owner.public_key(), data=NamespaceData(field="http root", space=4, data="data"))
+        sender = Sender(max_retries=0)
+        self.assertEqual([r.action for r in bulk.create_many(client, [root], owner, sender=sender)], [bulk.CREATED])
+        self.assertEqual([r.action for r in bulk.create_many(client, [root], owner, sender=sender)], [bulk.SKIPPED])
+        self.assertEqual(plan_sync([root], client, sender=sender).steps, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import json
+import unittest
+
+from solana.account import Account
+
+from sol_namespace.cli import JobRunner, read_records, run_jobs
+from sol_namespace.sender import Sender
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+
+
+JOBS = """\
+{"op": "create", "field": "cli root", "data": "hello"}
+{"op": "create", "field": "cli child", "parent": ["cli root"], "data": "world"}
+{"op": "read", "field": "cli child", "parent": ["cli root"]}
+"""
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.client = SimulatedClient(NameServiceSimulator(seed=0))
+        self.keypair = Account(bytes(range(32)))
+
+    def run_jobs(self, jobs: str, keypair) -> list:
+        output = io.StringIO()
+        run_jobs(JobRunner(self.client, Sender(), keypair), read_records(io.StringIO(jobs), 'jsonl'), output)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_create_and_read(self):
+        results = self.run_jobs(JOBS, self.keypair)
+        self.assertTrue(all(result['ok'] for result in results), results)
+        self.assertEqual(results[2]['result'], "world")
+
+    def test_read_under_parent_without_keypair(self):
+        self.run_jobs(JOBS, self.keypair)
+        results = self.run_jobs(JOBS.splitlines()[2], None)
+        self.assertEqual(results[0]['result'], "world")
+        self.assertTrue(results[0]['ok'])
+
+    def test_malformed_lines_fail_alone(self):
+        results = self.run_jobs(JOBS.splitlines()[0] + "\nnot json\n[1, 2]\n" + JOBS.splitlines()[1], self.keypair)
+        self.assertEqual([result['ok'] for result in results], [True, False, False, True])
+        self.assertEqual([result['line'] for result in results], [1, 2, 3, 4])
+        self.assertIn("invalid JSON", results[1]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
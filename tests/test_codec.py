@@ -0,0 +1,89 @@
+import json
+import pickle
+import unittest
+import zlib
+
+from solana.account import Account
+
+from sol_namespace import codec
+from sol_namespace import operations
+from sol_namespace.codec import Codec, CodecError, CompressedData, decode, train_dictionary
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+
+
+class JsonData(NamespaceData):
+    def serialize(self) -> bytes:
+        return json.dumps(self.data).encode()
+
+    @classmethod
+    def deserialize(cls, raw_data: bytes):
+        return json.loads(raw_data.rstrip(b"\0"))
+
+
+RECORDS = [f'{{"user": "user{i}", "bio": "Posting about Solana name service accounts"}}'.encode() for i in range(20)]
+
+
+class CodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        encoded = Codec().encode(RECORDS[0] * 4)
+        self.assertLess(len(encoded), len(RECORDS[0] * 4))
+        self.assertEqual(decode(encoded + bytes(10)), RECORDS[0] * 4)  # Ignores padding
+
+    def test_dictionary(self):
+        trained = Codec(dictionary=train_dictionary(RECORDS[:10], size=256))
+        encoded = trained.encode(RECORDS[15])
+        self.assertLess(len(encoded), len(Codec().encode(RECORDS[15])))
+        self.assertEqual(decode(encoded), RECORDS[15])
+
+    def test_incompressible_data_is_stored(self):
+        raw = bytes(range(64))
+        encoded = Codec().encode(raw)
+        self.assertEqual(len(encoded), Codec().bound(len(raw)))
+        self.assertEqual(decode(encoded), raw)
+
+    def test_plain_data_passes_through(self):
+        self.assertEqual(decode(b"plain text"), b"plain text")
+
+    def test_corrupt_data(self):
+        encoded = Codec().encode(RECORDS[0] * 4)
+        with self.assertRaises(CodecError):
+            decode(encoded[:codec.HEADER_LEN + 4])
+        unknown = codec._HEADER.pack(codec.MAGIC, codec.DEFLATE, 7, 10) + encoded[codec.HEADER_LEN:]
+        with self.assertRaisesRegex(CodecError, "unregistered dictionary"):
+            decode(unknown)
+
+    def test_rejects_unbounded_deflate(self):
+        bomb = zlib.compressobj(9, zlib.DEFLATED, -15)
+        payload = bomb.compress(bytes(10 ** 6)) + bomb.flush()
+        with self.assertRaises(CodecError):
+            decode(codec._HEADER.pack(codec.MAGIC, codec.DEFLATE, 0, 0) + payload)
+        self.assertEqual(decode(Codec().encode(b"")), b"")
+
+
+class CompressedDataTest(unittest.TestCase):
+    def test_deserializes_with_inner_type(self):
+        data = CompressedData(JsonData(field="json", space=0, data={"bio": "hello " * 20}))
+        self.assertIs(type(data), CompressedData.of(JsonData))
+        self.assertEqual(type(data).deserialize(data.serialize()), {"bio": "hello " * 20})
+        self.assertEqual(CompressedData(NamespaceData(field="raw", space=0, data="x")).deserialize(
+            Codec().encode(b"x")), b"x")
+
+    def test_pickles(self):
+        data = CompressedData(JsonData(field="json", space=64, data=[1, 2]), space=64)
+        copy = pickle.loads(pickle.dumps(data))
+        self.assertIs(type(copy), type(data))
+        self.assertEqual((copy.space, copy.data, copy.serialize()), (64, [1, 2], data.serialize()))
+
+    def test_get_name_data(self):
+        client = SimulatedClient(NameServiceSimulator(seed=0))
+        owner = Account(bytes(range(32)))
+        node = NamespaceNode(
+            owner_account=owner.public_key(),
+            data=CompressedData(JsonData(field="compressed", space=0, data={"posts": ["gm"] * 50}), space=256))
+        operations.create(client, node, owner)
+        self.assertEqual(operations.get_name_data(client, node), {"posts": ["gm"] * 50})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import copy
+import dataclasses
+import pickle
+import unittest
+
+from solana.account import Account
+from spl.name_service.utils import get_hashed_name
+
+from sol_namespace.name_model import NamespaceData, NamespaceNode, default_program, hash_names
+
+
+class NameModelTest(unittest.TestCase):
+    def setUp(self):
+        self.owner = Account(bytes(range(32))).public_key()
+        self.root = NamespaceNode(owner_account=self.owner, data=NamespaceData(field="root", space=0))
+        self.child = self.root.create_child(NamespaceData(field="child", space=4, data="data"))
+
+    def test_hash_name_matches_spl(self):
+        prefix = default_program.hash_prefix
+        self.assertEqual(default_program.hash_name("child"), get_hashed_name(prefix, "child"))
+        self.assertEqual(list(hash_names(default_program, ["a", "b"])),
+                         [get_hashed_name(prefix, "a"), get_hashed_name(prefix, "b")])
+
+    def test_nodes_pickle_and_copy(self):
+        restored = pickle.loads(pickle.dumps(self.child))
+        self.assertEqual(restored.account, self.child.account)
+        self.assertEqual(restored.parent.account, self.root.account)
+        self.assertEqual(copy.deepcopy(self.child).hashed_name_field, self.child.hashed_name_field)
+        self.assertEqual(dataclasses.asdict(default_program)['hash_prefix'], default_program.hash_prefix)
+
+    def test_nodes_do_not_reference_siblings(self):
+        for i in range(50):
+            self.root.create_child(NamespaceData(field=f"sibling {i}", space=4))
+        self.assertLess(len(pickle.dumps(self.child)), 2 * len(pickle.dumps(self.root)))
+
+if __name__ == '__main__':
+    unittest.main()
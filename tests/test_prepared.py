@@ -0,0 +1,46 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from solana.account import Account
+from solana.transaction import Transaction
+
+from sol_namespace import instruction
+from sol_namespace import operations
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.prepared import PreparedUpdate
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+
+
+class PreparedUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.owner = Account(bytes(range(32)))
+        self.node = NamespaceNode(
+            owner_account=self.owner.public_key(), data=NamespaceData(field="hot", space=32, data="initial"))
+        self.prepared = PreparedUpdate(self.node, self.owner)
+        self.blockhash = str(self.owner.public_key())  # Any 32 bytes in base58
+
+    def test_matches_transaction(self):
+        tx = Transaction()
+        tx.add(instruction.update_instruction(self.node, offset=3, input_data=b"patch"))
+        tx.recent_blockhash = self.blockhash
+        tx.sign(self.owner)
+        self.assertEqual(self.prepared.compile(self.blockhash, b"patch", offset=3), tx.serialize())
+
+    def test_concurrent_compiles(self):
+        payloads = [f"update {i}".encode() for i in range(200)]
+        with ThreadPoolExecutor(8) as pool:
+            compiled = list(pool.map(lambda data: self.prepared.compile(self.blockhash, data), payloads))
+        for data, raw in zip(payloads, compiled):
+            tx = Transaction.deserialize(raw)
+            self.assertTrue(tx.verify_signatures())
+            self.assertEqual(tx.instructions[0].data[9:], data)
+
+    def test_send(self):
+        client = SimulatedClient(NameServiceSimulator(seed=0))
+        operations.create(client, self.node, self.owner)
+        self.prepared.send(client, b"sent")
+        self.assertEqual(operations.get_name_data(client, self.node)[:7], b"sential")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+from solana.account import Account
+from solana.transaction import Transaction
+
+from sol_namespace import instruction
+from sol_namespace import operations
+from sol_namespace import ring as ring_module
+from sol_namespace.name_model import NamespaceNode
+from sol_namespace.ring import (
+    _HEAD, _HEAD_OFFSET, ConflictError, RingBufferData, RingBufferError, _slot, append, parse, read_latest, slot_offset)
+from sol_namespace.sender import Sender
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+
+
+class RingBufferDataTest(unittest.TestCase):
+    def test_wrap_around(self):
+        data = RingBufferData("ring", slots=3, slot_size=8, entries=[b"%d" % i for i in range(5)])
+        state = parse(data.serialize().ljust(data.space, b"\0"))
+        self.assertEqual(state.head, 5)
+        self.assertEqual(state.latest(), [b"2", b"3", b"4"])
+        self.assertEqual(state.latest(2), [b"3", b"4"])
+        self.assertEqual(RingBufferData.deserialize(data.serialize()), [b"2", b"3", b"4"])
+
+    def test_serializes_only_written_slots(self):
+        data = RingBufferData("ring", slots=32, slot_size=280)
+        self.assertEqual(parse(data.serialize()).latest(), [])
+        self.assertLess(len(data.serialize()), 32)
+        data.data = [b"first"]
+        self.assertLess(len(data.serialize()), 300)
+
+    def test_rejects_oversize_entries(self):
+        with self.assertRaises(RingBufferError):
+            RingBufferData("ring", slots=2, slot_size=4, entries=[b"too long"]).serialize()
+
+
+class RingBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.client = SimulatedClient(NameServiceSimulator(seed=0))
+        self.sender = Sender(max_retries=0)
+        self.funder = Account(bytes(range(32)))
+
+    def test_create_and_append(self):
+        # Dimensions from the README
+        timeline = NamespaceNode(
+            owner_account=self.funder.public_key(), data=RingBufferData("timeline", slots=32, slot_size=280))
+        operations.create(self.client, timeline, self.funder, sender=self.sender)
+        for i in range(40):
+            self.assertEqual(append(self.client, timeline, self.funder, b"post %d" % i, sender=self.sender), i)
+        self.assertEqual(read_latest(self.client, timeline, 2, sender=self.sender), [b"post 38", b"post 39"])
+        self.assertEqual(len(read_latest(self.client, timeline, sender=self.sender)), 32)
+
+    def test_stale_append_does_not_hide_newer_entries(self):
+        ring = NamespaceNode(
+            owner_account=self.funder.public_key(), data=RingBufferData("stale", slots=8, slot_size=16))
+        operations.create(self.client, ring, self.funder, sender=self.sender)
+        for entry in (b"B0", b"B1", b"B2"):
+            append(self.client, ring, self.funder, entry, sender=self.sender)
+        # An appender that read the head before B0, writing its slot and head in one transaction
+        tx = Transaction().add(
+            instruction.update_instruction(ring, offset=slot_offset(8, 16, 0), input_data=_slot(0, 1, b"A", 16)),
+            instruction.update_instruction(ring, offset=_HEAD_OFFSET, input_data=_HEAD.pack(1)))
+        self.sender.send(self.client, tx, self.funder)
+        self.assertEqual(read_latest(self.client, ring, sender=self.sender), [b"A", b"B1", b"B2"])
+        self.assertEqual(append(self.client, ring, self.funder, b"B3", sender=self.sender), 3)
+        self.assertEqual(read_latest(self.client, ring, 2, sender=self.sender), [b"B2", b"B3"])
+
+    def test_verification_fails_on_stale_head(self):
+        ring = NamespaceNode(
+            owner_account=self.funder.public_key(), data=RingBufferData("stale", slots=8, slot_size=16))
+        operations.create(self.client, ring, self.funder, sender=self.sender)
+        stale = [ring_module._fetch(self.client, ring, self.sender)]
+        for entry in (b"B0", b"B1", b"B2"):
+            append(self.client, ring, self.funder, entry, sender=self.sender)
+        fetch = ring_module._fetch
+        with mock.patch.object(ring_module, '_fetch', lambda *args: stale.pop() if stale else fetch(*args)):
+            with self.assertRaises(ConflictError):
+                append(self.client, ring, self.funder, b"A", sender=self.sender, poll_interval=0)
+        self.assertEqual(read_latest(self.client, ring, sender=self.sender), [b"A", b"B1", b"B2"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import time
+import unittest
+
+import requests
+from solana.account import Account
+from solana.rpc.api import Client
+
+from sol_namespace import bulk
+from sol_namespace import operations
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.router import RpcRouter
+from sol_namespace.sender import Sender
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient, serve
+
+
+class Endpoint(SimulatedClient):
+    """
+    Simulated endpoint with its own latency, optionally failing every request with `status`.
+    """
+    def __init__(self, simulator, endpoint_uri, latency=0.0, status=None):
+        super().__init__(simulator, endpoint_uri)
+        self.latency = latency
+        self.status = status
+        self.requests = 0
+
+    def _request(self, method, *params):
+        self.requests += 1
+        time.sleep(self.latency)
+        if self.status is not None:
+            response = requests.Response()
+            response.status_code = self.status
+            raise requests.HTTPError(f"{self.status} Error", response=response)
+        return super()._request(method, *params)
+
+
+class RouterTest(unittest.TestCase):
+    def setUp(self):
+        self.simulator = NameServiceSimulator(seed=0)
+        self.owner = Account(bytes(range(32)))
+        self.node = NamespaceNode(
+            owner_account=self.owner.public_key(), data=NamespaceData(field="routed", space=4, data="data"))
+        operations.create(SimulatedClient(self.simulator), self.node, self.owner)
+        self.sender = Sender(max_retries=0)
+
+    def router(self, *endpoints, **kwargs) -> RpcRouter:
+        router = RpcRouter(endpoints, probe_interval=None, **kwargs)
+        self.addCleanup(router.close)
+        return router
+
+    def read(self, router: RpcRouter) -> bytes:
+        return operations.get_name_data(router, self.node, sender=self.sender)
+
+    def test_ejects_endpoints_failing_with_http_errors(self):
+        healthy = Endpoint(self.simulator, "sim://healthy", latency=0.01)
+        forbidden = Endpoint(self.simulator, "sim://forbidden", status=403)
+        router = self.router(forbidden, healthy, failure_threshold=2)
+        for _ in range(10):
+            self.assertEqual(self.read(router), b"data")
+        self.assertEqual(forbidden.requests, 1)  # Failed over, then ranked last
+        router.refresh()
+        self.assertEqual(router.stats['ejected'], 1)
+        self.assertEqual([e.name for e in router.ranked()], ["sim://healthy"])
+
+    def test_hedges_slow_reads(self):
+        slow = Endpoint(self.simulator, "sim://slow", latency=0.3)
+        fast = Endpoint(self.simulator, "sim://fast", latency=0.01)
+        router = self.router(slow, fast, hedge_after=0.05)
+        router.endpoints[0].latency = 0.01  # Believed fastest, but actually slow
+        router.endpoints[1].latency = 0.02
+        start = time.monotonic()
+        self.assertEqual(self.read(router), b"data")
+        self.assertLess(time.monotonic() - start, 0.25)
+        self.assertEqual(router.stats['hedged'], 1)
+
+    def test_prefers_caught_up_endpoints(self):
+        lagging = Endpoint(self.simulator, "sim://lagging")
+        current = Endpoint(self.simulator, "sim://current")
+        router = self.router(lagging, current, max_slot_lag=10)
+        router.refresh()
+        router.endpoints[0].slot -= 100
+        self.assertEqual([e.name for e in router.ranked()], ["sim://current"])
+
+    def test_broadcast_send(self):
+        endpoints = [Endpoint(self.simulator, f"sim://{i}") for i in range(3)]
+        router = self.router(*endpoints, broadcast=2)
+        sent = self.simulator.stats['sendTransaction']
+        self.node.data.data = "sent"
+        operations.update(router, self.node, self.owner, sender=self.sender)
+        self.assertEqual(self.read(router), b"sent")
+        router.close(wait=True)  # The slower send may still be in flight
+        self.assertEqual(self.simulator.stats['sendTransaction'] - sent, 2)
+
+    def test_rate_limits_each_endpoint(self):
+        limited = Endpoint(self.simulator, "sim://limited")
+        sender = Sender(endpoint_rates={"sim://limited": (10.0, 1.0)}, max_retries=0)
+        router = self.router(limited, sender=sender)
+        start = time.monotonic()
+        for _ in range(4):
+            self.assertEqual(operations.get_name_data(router, self.node, sender=sender), b"data")
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+        self.assertEqual(limited.requests, 4)
+
+    def test_solana_clients(self):
+        servers = [serve(self.simulator, port=0) for _ in range(2)]
+        for server in servers:
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+        router = self.router(*[server.url for server in servers])
+        self.assertEqual(self.read(router), b"data")
+        self.assertIsNotNone(bulk.fetch_accounts(router, [self.node.account], self.sender)[0])
+        self.assertTrue(all(endpoint.failures == 0 for endpoint in router.endpoints))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from solana.account import Account
+from solana.rpc.exception import SolanaException
+
+from sol_namespace import operations
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.sender import ErrorKind, NameServiceException, Sender, classify
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+
+
+def _error(err) -> SolanaException:
+    exception = SolanaException()
+    exception.data = {'code': -32002, 'message': "failed", 'data': {'err': err, 'logs': []}}
+    return exception
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_transaction_errors(self):
+        self.assertIs(classify(_error('BlockhashNotFound')), ErrorKind.EXPIRED)
+        self.assertIs(classify(_error('AlreadyProcessed')), ErrorKind.PROCESSED)
+        self.assertIs(classify(_error('AccountInUse')), ErrorKind.RETRY)
+        self.assertIs(classify(_error({'InstructionError': [0, {'Custom': 0}]})), ErrorKind.FATAL)
+
+
+class SenderTest(unittest.TestCase):
+    def setUp(self):
+        self.simulator = NameServiceSimulator(seed=0)
+        self.client = SimulatedClient(self.simulator)
+        self.sender = Sender(base_delay=0.01, max_delay=0.05)
+        self.owner = Account(bytes(range(32)))
+        self.node = NamespaceNode(
+            owner_account=self.owner.public_key(),
+            data=NamespaceData(field="sender test", space=4, data="AAAA"))
+        operations.create(self.client, self.node, self.owner, sender=self.sender)
+
+    def stored(self) -> bytes:
+        return operations.get_name_data(self.client, self.node, sender=self.sender)
+
+    def test_repeated_update_is_not_dropped(self):
+        txids = []
+        for data in ("BBBB", "AAAA", "BBBB"):
+            self.node.data.data = data
+            txids.append(operations.update(self.client, self.node, self.owner, sender=self.sender))
+        self.assertEqual(self.stored(), b"BBBB")
+        self.assertEqual(len(set(txids)), 3)
+        self.assertEqual(self.sender.stats['duplicate'], 1)
+
+    def test_retries_injected_failures(self):
+        self.simulator.failure_rate = 0.3
+        for i in range(10):
+            self.node.data.data = f"{i:04}"
+            operations.update(self.client, self.node, self.owner, sender=self.sender)
+        self.simulator.failure_rate = 0
+        self.assertEqual(self.stored(), b"0009")
+        self.assertGreater(self.sender.stats['rate_limited'], 0)
+
+    def test_resigns_expired_transactions(self):
+        self.sender.recent_blockhash(self.client)
+        self.simulator.advance(self.simulator.blockhash_ttl + 1)
+        self.node.data.data = "CCCC"
+        operations.update(self.client, self.node, self.owner, sender=self.sender)
+        self.assertEqual(self.stored(), b"CCCC")
+        self.assertEqual(self.sender.stats['expired'], 1)
+
+    def test_create_raises_name_service_errors(self):
+        with self.assertRaises(NameServiceException) as raised:
+            operations.create(self.client, self.node, self.owner, sender=self.sender)
+        self.assertEqual(raised.exception.error.code, 'name_exists')
+        self.assertEqual(raised.exception.error.instruction, 'Create')
+
+
+if __name__ == '__main__':
+    unittest.main()
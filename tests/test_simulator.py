@@ -0,0 +1,57 @@
+import unittest
+
+from solana.account import Account
+from solana.rpc.exception import SolanaException
+from solana.transaction import Transaction
+
+from sol_namespace import instruction
+from sol_namespace import operations
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+
+
+class SimulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.simulator = NameServiceSimulator(seed=0)
+        self.client = SimulatedClient(self.simulator)
+        self.owner = Account(bytes(range(32)))
+
+    def node(self, field: str, space: int, data: str='') -> NamespaceNode:
+        return NamespaceNode(owner_account=self.owner.public_key(), data=NamespaceData(field=field, space=space, data=data))
+
+    def test_create_update_read(self):
+        node = self.node("simulated", 8, "hello")
+        operations.create(self.client, node, self.owner)
+        node.data.data = "bye"
+        operations.update(self.client, node, self.owner)
+        self.assertEqual(operations.get_name_data(self.client, node), b"byelo\0\0\0")
+
+    def test_rejects_wrong_signer(self):
+        node = self.node("simulated", 8, "hello")
+        operations.create(self.client, node, self.owner)
+        intruder = Account(bytes(range(1, 33)))
+        tx = Transaction()
+        tx.add(instruction.update_instruction(NamespaceNode(
+            owner_account=intruder.public_key(), data=NamespaceData(field="simulated", space=8, data="evil"))))
+        with self.assertRaises(SolanaException):
+            self.client.send_transaction(tx, intruder)
+
+    def test_rejects_oversize_transactions(self):
+        node = self.node("large", 1200, "x" * 1200)
+        with self.assertRaisesRegex(RuntimeError, "transaction too large"):
+            self.client.send_transaction(
+                Transaction().add(instruction.create_instruction(node), instruction.update_instruction(node)),
+                self.owner)
+
+    def test_prunes_expired_blockhashes(self):
+        node = self.node("pruned", 4, "data")
+        operations.create(self.client, node, self.owner)
+        self.assertEqual(len(self.simulator._processed), 1)
+        self.simulator.advance(self.simulator.blockhash_ttl + 1)
+        self.simulator.recent_blockhash()
+        self.assertEqual(len(self.simulator._blockhashes), 1)
+        self.assertEqual(self.simulator._processed, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
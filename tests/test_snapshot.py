@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from solana.account import Account
+
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.snapshot import SnapshotError, load_tree, save_tree
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.owner = Account(bytes(range(32))).public_key()
+        self.root = NamespaceNode(owner_account=self.owner, data=NamespaceData(field="root", space=0), balance=5)
+        self.children = [
+            self.root.create_child(NamespaceData(field=f"child {i}", space=8, data=f"v{i}")) for i in range(3)
+        ]
+        self.grandchild = self.children[1].create_child(NamespaceData(field="grandchild", space=4, data="gc"))
+        self.nodes = [self.root] + self.children + [self.grandchild]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "tree.snapshot")
+
+    def test_round_trip(self):
+        save_tree(self.nodes, self.path)
+        with load_tree(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 5)
+            for original, restored in zip(self.nodes, snapshot):
+                self.assertEqual(restored.account, original.account)
+                self.assertEqual(restored.bump, original.bump)
+                self.assertEqual(restored.hashed_name_field, original.hashed_name_field)
+                self.assertEqual(restored.owner_account, original.owner_account)
+                self.assertEqual(restored.balance, original.balance)
+                self.assertEqual(restored.data.field, original.data.field)
+                self.assertEqual(restored.data.serialize(), original.data.serialize())
+            found = snapshot.find(self.grandchild.account)
+            self.assertEqual(found.parent.account, self.children[1].account)
+
+    def test_rejects_misordered_and_duplicate_nodes(self):
+        with self.assertRaises(ValueError):
+            save_tree([self.grandchild] + self.nodes, self.path)
+        with self.assertRaises(ValueError):
+            save_tree(self.nodes + [self.root.create_child(NamespaceData(field="child 0", space=8))], self.path)
+
+    def test_rejects_empty_and_truncated_files(self):
+        open(self.path, 'wb').close()
+        with self.assertRaises(SnapshotError):
+            load_tree(self.path)
+        save_tree(self.nodes, self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for size in (10, 80, len(data) // 2, len(data) - 1):
+            with open(self.path, 'wb') as f:
+                f.write(data[:size])
+            with self.assertRaises(SnapshotError):
+                with load_tree(self.path) as snapshot:
+                    list(snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
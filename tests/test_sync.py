@@ -0,0 +1,96 @@
+import unittest
+
+from solana.account import Account
+
+from sol_namespace import operations
+from sol_namespace.name_model import NamespaceData, NamespaceNode
+from sol_namespace.simulator import NameServiceSimulator, SimulatedClient
+from sol_namespace.sync import CREATE, MAX_CHUNK, TRANSFER, UPDATE, apply_plan, changed_ranges, plan_sync
+
+
+class ChangedRangesTest(unittest.TestCase):
+    def test_merges_close_ranges(self):
+        old = bytes(100)
+        new = bytearray(old)
+        new[10:12] = b"ab"
+        new[20:22] = b"cd"
+        new[90] = 1
+        self.assertEqual(changed_ranges(old, bytes(new), max_gap=16), [(10, 22), (90, 91)])
+
+    def test_caps_range_length(self):
+        old, new = bytes(3000), b"x" * 3000
+        ranges = changed_ranges(old, new)
+        self.assertTrue(all(end - start <= MAX_CHUNK for start, end in ranges))
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (0, 3000))
+
+
+class SyncTest(unittest.TestCase):
+    def setUp(self):
+        self.client = SimulatedClient(NameServiceSimulator(seed=0))
+        self.funder = Account(bytes(range(32)))
+        self.root = NamespaceNode(
+            owner_account=self.funder.public_key(), data=NamespaceData(field="sync root", space=0))
+        self.child = self.root.create_child(NamespaceData(field="child", space=11, data="hello world"))
+        self.nodes = [self.root, self.child]
+
+    def sync(self, *signers, state=None):
+        plan = plan_sync(self.nodes, self.client, state)
+        result = apply_plan(self.client, plan, self.funder, *signers)
+        self.assertTrue(result.ok, [r.error for r in result.results if not r.ok])
+        return plan, result.state
+
+    def stored(self, node: NamespaceNode) -> bytes:
+        return operations.get_name_data(self.client, node)
+
+    def test_repeated_sync_is_empty(self):
+        plan, state = self.sync()
+        self.assertEqual(plan.counts(), {CREATE: 2})
+        self.assertEqual(plan_sync(self.nodes, self.client, state).steps, [])
+        self.assertEqual(plan_sync(self.nodes, self.client).steps, [])
+
+    def test_shrinking_data_clears_stale_bytes(self):
+        _, state = self.sync()
+        self.child.data.data = "bye"
+        self.assertEqual(self.sync(state=state)[0].counts(), {UPDATE: 1})
+        self.assertEqual(self.stored(self.child), b"bye".ljust(11, b"\0"))
+        self.assertEqual(plan_sync(self.nodes, self.client).steps, [])
+
+    def test_new_child_under_transferred_parent(self):
+        self.sync()
+        new_owner = Account(bytes(range(1, 33)))
+        self.root.owner_account = new_owner.public_key()
+        self.nodes.append(NamespaceNode(
+            owner_account=new_owner.public_key(),
+            data=NamespaceData(field="new child", space=3, data="new"),
+            parent=self.root))
+        plan, _ = self.sync(new_owner)
+        self.assertEqual(plan.counts(), {TRANSFER: 1, CREATE: 1})
+
+    def test_unapplied_plan_keeps_state(self):
+        _, state = self.sync()
+        self.child.data.data = "bye"
+        preview = plan_sync(self.nodes, self.client, state)
+        self.assertEqual(preview.counts(), {UPDATE: 1})
+        self.assertEqual(plan_sync(self.nodes, self.client, state).counts(), {UPDATE: 1})
+
+    def test_failed_steps_are_rechecked(self):
+        _, state = self.sync()
+        self.child.data.data = "bye"
+        result = apply_plan(self.client, plan_sync(self.nodes, self.client, state), Account(bytes(range(2, 34))))
+        self.assertFalse(result.ok)
+        self.assertNotIn(bytes(self.child.account), result.state)
+        self.assertIn(bytes(self.root.account), result.state)
+        self.assertEqual(plan_sync(self.nodes, self.client, result.state).counts(), {UPDATE: 1})
+
+    def test_large_data_is_chunked(self):
+        large = self.root.create_child(NamespaceData(field="large", space=1100, data="a" * 1100))
+        self.nodes.append(large)
+        self.sync()
+        self.assertEqual(self.stored(large), b"a" * 1100)
+        large.data.data = "b" * 1000
+        self.sync()
+        self.assertEqual(self.stored(large), b"b" * 1000 + bytes(100))
+
+
+if __name__ == '__main__':
+    unittest.main()